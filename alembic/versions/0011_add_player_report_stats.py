@@ -0,0 +1,47 @@
+"""Add player report stats
+
+Revision ID: e6a5b17ff5cf
+Revises: d8c98d2fef8b
+Create Date: 2026-10-17 10:12:41.503127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6a5b17ff5cf'
+down_revision: Union[str, None] = 'd8c98d2fef8b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('player_report_stats',
+        sa.Column('pr_id', sa.Integer(), nullable=False),
+        sa.Column('num_banned', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('num_rejected', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('num_rejected_insufficient', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('num_rejected_inconclusive', sa.Integer(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['pr_id'], ['player_reports.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('pr_id')
+    )
+
+    # Populate stats from existing responses
+    op.execute("""
+        INSERT INTO player_report_stats (pr_id, num_banned, num_rejected, num_rejected_insufficient, num_rejected_inconclusive)
+        SELECT
+            pr_id,
+            COUNT(*) FILTER (WHERE banned),
+            COUNT(*) FILTER (WHERE NOT banned),
+            COUNT(*) FILTER (WHERE NOT banned AND reject_reason = 'INSUFFICIENT'),
+            COUNT(*) FILTER (WHERE NOT banned AND reject_reason = 'INCONCLUSIVE')
+        FROM player_report_responses
+        GROUP BY pr_id;
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('player_report_stats')
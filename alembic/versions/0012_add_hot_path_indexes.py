@@ -0,0 +1,51 @@
+"""Add hot path indexes
+
+Revision ID: 3b9f04c2a7d1
+Revises: e6a5b17ff5cf
+Create Date: 2026-10-17 14:03:27.918245
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9f04c2a7d1'
+down_revision: Union[str, None] = 'e6a5b17ff5cf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ('ix_player_reports_player_id', 'player_reports', ['player_id']),
+    ('ix_player_reports_report_id', 'player_reports', ['report_id']),
+    ('ix_player_report_responses_community_id', 'player_report_responses', ['community_id']),
+    ('ix_player_watchlists_community_id', 'player_watchlists', ['community_id']),
+    ('ix_report_tokens_community_id', 'report_tokens', ['community_id']),
+    ('ix_report_tokens_admin_id', 'report_tokens', ['admin_id']),
+]
+
+# Note that player_bans.player_id is already covered by the
+# (player_id, integration_id) unique constraint.
+
+
+def upgrade() -> None:
+    # Indexes cannot be created concurrently inside of a transaction
+    with op.get_context().autocommit_block():
+        for index_name, table_name, columns in INDEXES:
+            op.create_index(
+                index_name, table_name, columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index_name, table_name, _ in reversed(INDEXES):
+            op.drop_index(
+                index_name, table_name=table_name,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,36 @@
+"""Add report pagination index
+
+Revision ID: 8a41d6e2f0c3
+Revises: 3b9f04c2a7d1
+Create Date: 2026-10-17 15:21:09.364712
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a41d6e2f0c3'
+down_revision: Union[str, None] = '3b9f04c2a7d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Indexes cannot be created concurrently inside of a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_reports_created_at_id', 'reports', ['created_at', 'id'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_reports_created_at_id', table_name='reports',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
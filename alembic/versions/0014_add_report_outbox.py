@@ -0,0 +1,37 @@
+"""Add report outbox
+
+Revision ID: c52e7a9b1d48
+Revises: 8a41d6e2f0c3
+Create Date: 2026-10-17 16:44:51.207386
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c52e7a9b1d48'
+down_revision: Union[str, None] = '8a41d6e2f0c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('report_outbox',
+        sa.Column('report_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('next_attempt_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('last_error', sa.String(), nullable=True),
+        sa.Column('created_by', sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(['report_id'], ['reports.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('report_id')
+    )
+    op.create_index('ix_report_outbox_next_attempt_at', 'report_outbox', ['next_attempt_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_report_outbox_next_attempt_at', table_name='report_outbox')
+    op.drop_table('report_outbox')
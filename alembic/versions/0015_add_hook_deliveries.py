@@ -0,0 +1,39 @@
+"""Add hook deliveries
+
+Revision ID: 71f3c8d05e96
+Revises: c52e7a9b1d48
+Create Date: 2026-10-17 18:02:13.665190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '71f3c8d05e96'
+down_revision: Union[str, None] = 'c52e7a9b1d48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('hook_deliveries',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('event', sa.String(), nullable=False),
+        sa.Column('hook', sa.String(), nullable=False),
+        sa.Column('args', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('next_attempt_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('last_error', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_hook_deliveries_next_attempt_at', 'hook_deliveries', ['next_attempt_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_hook_deliveries_next_attempt_at', table_name='hook_deliveries')
+    op.drop_table('hook_deliveries')
@@ -0,0 +1,45 @@
+"""Add ban sync state
+
+Revision ID: 4d9e2b7a61f0
+Revises: 71f3c8d05e96
+Create Date: 2026-10-17 20:41:37.218504
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d9e2b7a61f0'
+down_revision: Union[str, None] = '71f3c8d05e96'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('integrations', sa.Column('bans_synced_until', sa.TIMESTAMP(timezone=True), nullable=True))
+    op.add_column('integrations', sa.Column('bans_fully_synced_at', sa.TIMESTAMP(timezone=True), nullable=True))
+    op.add_column('player_bans', sa.Column('expires_at', sa.TIMESTAMP(timezone=True), nullable=True))
+
+    # Indexes cannot be created concurrently inside of a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_player_bans_integration_id_remote_id', 'player_bans', ['integration_id', 'remote_id'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_player_bans_integration_id_remote_id', table_name='player_bans',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+    op.drop_column('player_bans', 'expires_at')
+    op.drop_column('integrations', 'bans_fully_synced_at')
+    op.drop_column('integrations', 'bans_synced_until')
@@ -1,17 +1,46 @@
 #!/usr/bin/env python
 
+import asyncio
+import logging.config
+import signal
+
 import uvicorn
 
 from barricade.logger import UVICORN_LOG_CONFIG, UVICORN_LOG_LEVEL
 
-from barricade.constants import WEB_HOST, WEB_PORT
-from barricade.web.app import app
+from barricade.constants import PROCESS_ROLE, WEB_HOST, WEB_PORT, WEB_WORKERS
+from barricade.db import create_tables, engine
+from barricade.services import run_services
+
+async def setup():
+    await create_tables()
+    # The connections cannot be reused outside of this event loop
+    await engine.dispose()
+
+async def run_bot():
+    """Run the Discord bot without serving the web API, until interrupted."""
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopped.set)
+
+    async with run_services():
+        await stopped.wait()
 
 if __name__ == '__main__':
-    uvicorn.run(
-        app,
-        host=WEB_HOST,
-        port=WEB_PORT,
-        log_config=UVICORN_LOG_CONFIG,
-        log_level=UVICORN_LOG_LEVEL,
-    )
+    # Create all database tables once, rather than in every worker
+    asyncio.run(setup())
+
+    if PROCESS_ROLE == "bot":
+        logging.config.dictConfig(UVICORN_LOG_CONFIG)
+        asyncio.run(run_bot())
+    else:
+        uvicorn.run(
+            # Has to be passed as an import string to support multiple workers
+            "barricade.web.app:app",
+            host=WEB_HOST,
+            port=WEB_PORT,
+            workers=WEB_WORKERS,
+            log_config=UVICORN_LOG_CONFIG,
+            log_level=UVICORN_LOG_LEVEL,
+        )
@@ -7,7 +7,8 @@ from discord import Embed
 from barricade import schemas
 from barricade.crud.bans import get_player_bans_for_community, get_player_bans_without_responses
 from barricade.crud.communities import get_community_by_id
-from barricade.crud.watchlists import get_watchlist_by_player_and_community
+from barricade.crud.responses import is_response_banned
+from barricade.crud.watchlists import delete_watchlist, get_watchlist_by_player_and_community
 from barricade.db import session_factory
 from barricade.discord.communities import get_forward_channel
 from barricade.discord.utils import get_error_embed
@@ -52,6 +53,11 @@ async def forward_errors(
 @add_hook(EventHooks.player_ban)
 async def on_player_ban(response: schemas.ResponseWithToken):
     async with session_factory() as db:
+        if not await is_response_banned(db, response.id):
+            # The response changed since, for instance because a delivery
+            # of this hook was retried after the player was unbanned
+            return
+
         community = await get_community_by_id(db, response.community_id)
         assert community is not None
 
@@ -218,4 +224,4 @@ async def remove_banned_players_from_watchlist(response: schemas.ResponseWithTok
             community_id=response.community_id,
         )
         if db_watchlist:
-            await db.delete(db_watchlist)
+            await delete_watchlist(db, db_watchlist)
@@ -0,0 +1,112 @@
+import asyncio
+from collections import defaultdict
+import json
+import logging
+from typing import Any, Callable
+from uuid import uuid4
+
+import asyncpg
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+
+from barricade.constants import DB_URL
+from barricade.db import session_factory
+from barricade.utils import Singleton, safe_create_task
+
+Handler = Callable[[Any], Any]
+
+class EventBus(Singleton):
+    """Distributes messages between all processes connected to the same
+    database, using Postgres' LISTEN/NOTIFY.
+
+    Messages consist of a topic and a small JSON-serializable payload, and
+    are delivered to the handlers subscribed to that topic in every process
+    except the one that published it. Delivery is best-effort: messages
+    published while a process is disconnected are not delivered to it.
+    Instead, handlers of the `EventBus.RECONNECT` topic are called when
+    a connection is re-established, so that they can resynchronize.
+    """
+    CHANNEL = "barricade"
+    RECONNECT = "reconnect"
+    RECONNECT_DELAY = 5
+
+    def __init__(self):
+        self.process_id = uuid4().hex
+        self._handlers: defaultdict[str, list[Handler]] = defaultdict(list)
+
+    def subscribe(self, topic: str, handler: Handler):
+        """Register a handler for a topic. Handlers may be coroutine functions."""
+        self._handlers[topic].append(handler)
+
+    def publish(self, topic: str, data: Any = None):
+        """Publish a message to all other processes in the background.
+
+        Parameters
+        ----------
+        topic : str
+            The topic of the message
+        data : Any, optional
+            A JSON-serializable payload. Note that Postgres limits the total
+            size of a message to just under 8000 bytes.
+        """
+        payload = json.dumps({
+            "topic": topic,
+            "origin": self.process_id,
+            "data": data,
+        }, separators=(",", ":"))
+        return safe_create_task(
+            self._send(payload),
+            err_msg=f"Failed to publish {topic} message",
+            name=f"EventBusPublish-{topic}",
+        )
+
+    async def _send(self, payload: str):
+        async with session_factory.begin() as db:
+            await db.execute(select(func.pg_notify(self.CHANNEL, payload)))
+
+    def _dispatch(self, topic: str, data: Any):
+        for handler in self._handlers.get(topic, ()):
+            try:
+                result = handler(data)
+                if asyncio.iscoroutine(result):
+                    safe_create_task(result, err_msg=f"Failed to handle {topic} message")
+            except Exception:
+                logging.exception("Failed to handle %s message", topic)
+
+    def _on_notification(self, connection, pid: int, channel: str, payload: str):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logging.warning("Received malformed message: %s", payload)
+            return
+
+        if message.get("origin") == self.process_id:
+            return
+        self._dispatch(message["topic"], message.get("data"))
+
+    async def run(self):
+        """Keep listening for messages until cancelled."""
+        dsn = make_url(DB_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+        connected_before = False
+        while True:
+            connection: asyncpg.Connection | None = None
+            try:
+                connection = conn = await asyncpg.connect(dsn)
+                closed = asyncio.Event()
+                conn.add_termination_listener(lambda _: closed.set())
+                await conn.add_listener(self.CHANNEL, self._on_notification)
+
+                logging.info("Listening for messages on channel %s", self.CHANNEL)
+                if connected_before:
+                    self._dispatch(self.RECONNECT, None)
+                connected_before = True
+
+                await closed.wait()
+                logging.warning("Lost connection to event bus, reconnecting...")
+            except Exception:
+                logging.exception("Failed to connect to event bus, retrying in %s seconds", self.RECONNECT_DELAY)
+            finally:
+                if connection and not connection.is_closed():
+                    await connection.close()
+
+            await asyncio.sleep(self.RECONNECT_DELAY)
@@ -12,6 +12,12 @@ def get_env_int(key: str, default: int) -> int:
 def get_env_float(key: str, default: float) -> float:
     return float(os.getenv(key, default))
 
+def get_env_bool(key: str, default: bool) -> bool:
+    value = os.getenv(key)
+    if value is None:
+        return default
+    return value.strip().lower() not in ('', '0', 'no', 'off', 'false')
+
 def get_env_datetime(key: str, default: datetime | None = None) -> datetime | None:
     value = os.getenv(key)
     if value:
@@ -38,6 +44,17 @@ WEB_HOST = os.getenv('WEB_HOST', '127.0.0.1')
 WEB_PORT = get_env_int('WEB_PORT', 8080)
 # Whether to leave Swagger UI enabled
 WEB_DOCS_VISIBLE = os.getenv('WEB_DOCS_VISIBLE', '1').strip().lower() not in ('', '0', 'no', 'off', 'false')
+# The number of processes to serve the web server with
+WEB_WORKERS = get_env_int('WEB_WORKERS', 1)
+
+# Which parts of the application this process runs. Either "web" to only serve the web API, "bot" to only
+# run the Discord bot, its integrations and background workers, or "all" to do both. Only one process at a
+# time runs the bot, with all others with a "bot" or "all" role standing by to take over.
+PROCESS_ROLE = os.getenv('PROCESS_ROLE', 'all').strip().lower()
+if PROCESS_ROLE not in ('web', 'bot', 'all'):
+    raise Exception("PROCESS_ROLE must be one of web, bot or all")
+# How often (in seconds) a standby process checks whether it can take over the bot
+LEADER_ELECTION_INTERVAL = get_env_float('LEADER_ELECTION_INTERVAL', 10.0)
 
 # Load DB parameters from env
 DB_HOST = os.getenv('DB_HOST', 'localhost')
@@ -54,6 +71,19 @@ DB_URL = URL.create(
     database="barricade",
 ).render_as_string(hide_password=False)
 
+# The number of connections to keep open in the database connection pool
+DB_POOL_SIZE = get_env_int('DB_POOL_SIZE', 10)
+# The number of connections that may be opened on top of the pool size during bursts
+DB_MAX_OVERFLOW = get_env_int('DB_MAX_OVERFLOW', 20)
+# The time (in seconds) to wait for a connection to become available before giving up
+DB_POOL_TIMEOUT = get_env_float('DB_POOL_TIMEOUT', 30.0)
+# The time (in seconds) after which connections are replaced. Set to -1 to never replace them.
+DB_POOL_RECYCLE = get_env_int('DB_POOL_RECYCLE', 60 * 30)
+# Whether to test connections for liveness before handing them out
+DB_POOL_PRE_PING = get_env_bool('DB_POOL_PRE_PING', True)
+# The number of prepared statements to cache per connection. Set to 0 when connecting through PgBouncer.
+DB_STATEMENT_CACHE_SIZE = get_env_int('DB_STATEMENT_CACHE_SIZE', 100)
+
 # Time it takes for web access tokens to expire
 ACCESS_TOKEN_EXPIRE_DELTA = timedelta(days=1)
 
@@ -95,6 +125,87 @@ T17_SUPPORT_CUTOFF_DATE = get_env_datetime('T17_SUPPORT_CUTOFF_DATE')
 # The chance for a user to recieve a confirmation prompt when banning a player that qualifies for forwarding to T17 support
 T17_SUPPORT_CONFIRMATION_PROMPT_CHANCE = get_env_float('T17_SUPPORT_CONFIRMATION_PROMPT_CHANCE', 0.0)
 
+# The maximum number of hooks that are executed simultaneously
+HOOK_WORKER_CONCURRENCY = get_env_int('HOOK_WORKER_CONCURRENCY', 10)
+# The maximum number of times each individual hook is executed simultaneously, unless overridden
+HOOK_CONCURRENCY = get_env_int('HOOK_CONCURRENCY', 5)
+# Overrides for the above per hook, in the format "module.hook_name=3,module.other_hook_name=1"
+HOOK_CONCURRENCY_OVERRIDES = {
+    name.strip(): int(limit)
+    for name, limit in (
+        override.split('=', 1)
+        for override in os.getenv('HOOK_CONCURRENCY_OVERRIDES', '').split(',')
+        if override.strip()
+    )
+}
+# The maximum number of executions of a single hook that may be waiting in memory. Further executions are dropped.
+HOOK_QUEUE_LIMIT = get_env_int('HOOK_QUEUE_LIMIT', 1000)
+# How often (in seconds) to check for hooks that are due to be executed
+HOOK_POLL_INTERVAL = get_env_float('HOOK_POLL_INTERVAL', 10.0)
+# The maximum time (in seconds) a hook may take before it is cancelled and retried
+HOOK_TIMEOUT = get_env_float('HOOK_TIMEOUT', 60.0 * 5)
+# The additional time (in seconds) a hook being executed is reserved for beyond its timeout,
+# before other workers may assume it was abandoned and claim it again
+HOOK_LEASE_GRACE_PERIOD = get_env_float('HOOK_LEASE_GRACE_PERIOD', 60.0)
+# The time (in seconds) to wait before retrying a failed hook. Doubles after each failed attempt.
+HOOK_RETRY_DELAY = get_env_float('HOOK_RETRY_DELAY', 5.0)
+# The maximum time (in seconds) to wait before retrying a failed hook
+HOOK_MAX_RETRY_DELAY = get_env_float('HOOK_MAX_RETRY_DELAY', 60.0 * 10)
+# The number of times a hook is attempted before giving up on it
+HOOK_MAX_ATTEMPTS = get_env_int('HOOK_MAX_ATTEMPTS', 8)
+
+# How often (in seconds) to check for reports whose public message still has to be sent
+REPORT_OUTBOX_POLL_INTERVAL = get_env_float('REPORT_OUTBOX_POLL_INTERVAL', 10.0)
+# The time (in seconds) to wait before retrying to send a report's public message. Doubles after each failed attempt.
+REPORT_OUTBOX_RETRY_DELAY = get_env_float('REPORT_OUTBOX_RETRY_DELAY', 5.0)
+# The maximum time (in seconds) to wait before retrying to send a report's public message
+REPORT_OUTBOX_MAX_RETRY_DELAY = get_env_float('REPORT_OUTBOX_MAX_RETRY_DELAY', 60.0 * 10)
+# The maximum time (in seconds) sending a report's public message may take before it is retried
+REPORT_OUTBOX_SEND_TIMEOUT = get_env_float('REPORT_OUTBOX_SEND_TIMEOUT', 30.0)
+# The number of reports whose public message can be sent simultaneously
+REPORT_OUTBOX_CONCURRENCY = get_env_int('REPORT_OUTBOX_CONCURRENCY', 5)
+
+# The maximum number of communities a new report is forwarded to simultaneously
+FORWARD_REPORT_CONCURRENCY = get_env_int('FORWARD_REPORT_CONCURRENCY', 5)
+
+# The time (in seconds) to wait before editing a report's messages, so that quick successive edits can be combined
+REPORT_EDIT_DELAY = get_env_float('REPORT_EDIT_DELAY', 2.0)
+# The maximum number of report messages that are edited simultaneously
+REPORT_EDIT_CONCURRENCY = get_env_int('REPORT_EDIT_CONCURRENCY', 5)
+
+# The time (in seconds) during which the same alert will not be sent again for a player
+PLAYER_ALERT_COOLDOWN = get_env_int('PLAYER_ALERT_COOLDOWN', 60 * 30)
+# How often (in seconds) to rebuild the in-memory index of reported and watchlisted players
+PLAYER_INDEX_RELOAD_INTERVAL = get_env_int('PLAYER_INDEX_RELOAD_INTERVAL', 60 * 60 * 6)
+
+# The maximum number of connections integrations may have open to external APIs, in total and per host
+INTEGRATION_HTTP_LIMIT = get_env_int('INTEGRATION_HTTP_LIMIT', 100)
+INTEGRATION_HTTP_LIMIT_PER_HOST = get_env_int('INTEGRATION_HTTP_LIMIT_PER_HOST', 10)
+# How long (in seconds) idle connections to external APIs are kept open for reuse
+INTEGRATION_HTTP_KEEPALIVE_TIMEOUT = get_env_float('INTEGRATION_HTTP_KEEPALIVE_TIMEOUT', 30.0)
+# How long (in seconds) resolved hostnames of external APIs are cached
+INTEGRATION_HTTP_DNS_CACHE_TTL = get_env_int('INTEGRATION_HTTP_DNS_CACHE_TTL', 60 * 5)
+# The maximum time (in seconds) to wait for a connection to, and a response from, an external API
+INTEGRATION_HTTP_CONNECT_TIMEOUT = get_env_float('INTEGRATION_HTTP_CONNECT_TIMEOUT', 10.0)
+INTEGRATION_HTTP_TIMEOUT = get_env_float('INTEGRATION_HTTP_TIMEOUT', 60.0)
+
+# The number of requests per second that can be made with each Battlemetrics API key on average, and at once
+BATTLEMETRICS_RATE_LIMIT = get_env_float('BATTLEMETRICS_RATE_LIMIT', 1.0)
+BATTLEMETRICS_RATE_LIMIT_BURST = get_env_int('BATTLEMETRICS_RATE_LIMIT_BURST', 15)
+# The number of times a Battlemetrics request is retried after being rate limited or failing temporarily
+BATTLEMETRICS_MAX_RETRIES = get_env_int('BATTLEMETRICS_MAX_RETRIES', 5)
+# The maximum number of bans that are added or removed on Battlemetrics simultaneously when (un)banning in bulk
+BATTLEMETRICS_BULK_CONCURRENCY = get_env_int('BATTLEMETRICS_BULK_CONCURRENCY', 5)
+# How often (in seconds) the entire Battlemetrics ban list is synchronized. Otherwise only changed bans are,
+# meaning that bans deleted on Battlemetrics are only noticed by full synchronizations.
+BATTLEMETRICS_FULL_SYNC_INTERVAL = get_env_int('BATTLEMETRICS_FULL_SYNC_INTERVAL', 60 * 60 * 24)
+# The number of records requested per page when fetching a CRCON blacklist
+CRCON_BLACKLIST_PAGE_SIZE = get_env_int('CRCON_BLACKLIST_PAGE_SIZE', 500)
+# The maximum number of CRCON blacklist pages that are requested simultaneously
+CRCON_BLACKLIST_CONCURRENCY = get_env_int('CRCON_BLACKLIST_CONCURRENCY', 4)
+# The number of bans after which the progress of bulk (un)bans is saved
+BULK_BAN_COMMIT_SIZE = get_env_int('BULK_BAN_COMMIT_SIZE', 50)
+
 # How many admins each community is allowed to have (excluding the owner)
 MAX_ADMIN_LIMIT = get_env_int('MAX_ADMIN_LIMIT', 3)
 # How many integrations each community is allowed to have
@@ -1,3 +1,5 @@
+from datetime import datetime
+from functools import partial
 from typing import Sequence
 import discord
 from sqlalchemy import exists, select, delete, not_, update
@@ -7,14 +9,16 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Load, selectinload, joinedload
 
 from barricade import schemas
-from barricade.crud.reports import get_report_by_id
-from barricade.crud.responses import get_community_responses_to_report
+from barricade.crud.reports import get_reports_by_ids
+from barricade.crud.responses import increment_response_stats
 from barricade.crud.watchlists import filter_watchlisted_player_ids
-from barricade.db import models
+from barricade.db import models, on_commit
 from barricade.discord import bot
+from barricade.discord.reports import report_message_edits
 from barricade.discord.views.player_review import PlayerReviewView
 from barricade.exceptions import AlreadyExistsError
 from barricade.logger import get_logger
+from barricade.utils import batched
 
 async def get_ban_by_id(db: AsyncSession, ban_id: int, load_relations: bool = False):
     """Look up a ban by its ID.
@@ -49,6 +53,54 @@ async def get_ban_by_player_and_integration(db: AsyncSession, player_id: str, in
         stmt = stmt.options(Load(models.PlayerBan).selectinload("*"))
     return await db.scalar(stmt)
 
+async def get_bans_by_players_and_integration(db: AsyncSession, player_ids: Sequence[str], integration_id: int):
+    if not player_ids:
+        return []
+    stmt = select(models.PlayerBan).where(
+        models.PlayerBan.player_id.in_(player_ids),
+        models.PlayerBan.integration_id == integration_id
+    )
+    result = await db.scalars(stmt)
+    return result.all()
+
+async def get_bans_by_remote_ids(db: AsyncSession, remote_ids: Sequence[str], integration_id: int):
+    if not remote_ids:
+        return []
+    stmt = select(models.PlayerBan).where(
+        models.PlayerBan.remote_id.in_(remote_ids),
+        models.PlayerBan.integration_id == integration_id
+    )
+    result = await db.scalars(stmt)
+    return result.all()
+
+async def get_bans_expiring_between(db: AsyncSession, integration_id: int, since: datetime, until: datetime):
+    """Get all bans of an integration that expire remotely within a
+    period of time, according to when they were last synchronized.
+
+    Parameters
+    ----------
+    db : AsyncSession
+        An asynchronous database session
+    integration_id : int
+        The ID of the integration
+    since : datetime
+        The start of the period, exclusive
+    until : datetime
+        The end of the period, inclusive
+
+    Returns
+    -------
+    Sequence[models.PlayerBan]
+        The bans expiring within the period
+    """
+    stmt = select(models.PlayerBan).where(
+        models.PlayerBan.integration_id == integration_id,
+        models.PlayerBan.expires_at > since,
+        models.PlayerBan.expires_at <= until,
+    )
+    result = await db.scalars(stmt)
+    return result.all()
+
 async def get_bans_by_integration(db: AsyncSession, integration_id: int):
     stmt = select(models.PlayerBan).where(
         models.PlayerBan.integration_id == integration_id
@@ -137,61 +189,135 @@ async def get_player_bans_without_responses(db: AsyncSession, player_ids: Sequen
     return result.all()
 
 async def expire_bans_of_player(db: AsyncSession, player_id: str, community_id: int):
-    stmt = (
-        update(models.PlayerReportResponse)
-            .values(banned=False, reject_reason=None)
-            .where(
-                models.PlayerReportResponse.banned.is_(True),
-                models.PlayerReportResponse.community_id == community_id,
-                models.PlayerReportResponse.pr_id.in_(
-                    select(models.PlayerReport.id)
-                        .where(models.PlayerReport.player_id == player_id)
-                    )
-                )
-            .returning(models.PlayerReportResponse.pr_id)
-    )
+    return await expire_bans_of_players(db, [player_id], community_id)
 
-    # Update rows
-    resp = await db.execute(stmt)
-    affected_pr_ids = [row[0] for row in resp.all()]
+async def expire_bans_of_players(db: AsyncSession, player_ids: Sequence[str], community_id: int):
+    """Mark a community's responses to all reports of the given players as
+    no longer banned, for instance because their bans expired. The
+    community's review messages of affected reports are refreshed once
+    the transaction is committed.
 
-    if affected_pr_ids:
-        # Update messages of affected reports
+    Parameters
+    ----------
+    db : AsyncSession
+        An asynchronous database session
+    player_ids : Sequence[str]
+        The IDs of the players whose bans expired
+    community_id : int
+        The ID of the community
+
+    Returns
+    -------
+    list[int]
+        The IDs of all affected reported players
+    """
+    affected_pr_ids: list[int] = []
+    for batch in batched(list(set(player_ids)), n=1000):
         stmt = (
-            select(models.ReportMessage)
-                .join(models.ReportMessage.report)
-                .join(models.PlayerReport)
+            update(models.PlayerReportResponse)
+                .values(banned=False, reject_reason=None)
                 .where(
-                    models.ReportMessage.community_id == community_id,
-                    models.PlayerReport.id.in_(affected_pr_ids)
-                )
+                    models.PlayerReportResponse.banned.is_(True),
+                    models.PlayerReportResponse.community_id == community_id,
+                    models.PlayerReportResponse.pr_id.in_(
+                        select(models.PlayerReport.id)
+                            .where(models.PlayerReport.player_id.in_(batch))
+                        )
+                    )
+                .returning(models.PlayerReportResponse.pr_id)
         )
-        db_messages = await db.scalars(stmt)
-        for db_message in db_messages:
-            db_report = await get_report_by_id(db, db_message.report_id, load_token=True)
-            report = schemas.ReportWithToken.model_validate(db_report)
-
-            db_responses = await get_community_responses_to_report(db, report, community_id)
-            responses = [
-                schemas.PendingResponse.model_validate(db_response)
-                for db_response in db_responses
-            ]
-
-            watchlisted_player_ids = await filter_watchlisted_player_ids(
-                db,
-                player_ids=[player.player_id for player in report.players],
-                community_id=community_id,
+
+        # Update rows
+        resp = await db.execute(stmt)
+        affected_pr_ids.extend(row[0] for row in resp.all())
+
+    if affected_pr_ids:
+        # Expired bans are counted as rejections without a reason
+        await increment_response_stats(db, affected_pr_ids, num_banned=-1, num_rejected=1)
+
+        # Update messages of affected reports
+        edits = await _get_review_message_edits(db, affected_pr_ids, community_id)
+        on_commit(db, partial(_schedule_review_message_edits, edits, community_id))
+
+    await db.flush()
+    return affected_pr_ids
+
+async def _get_review_message_edits(db: AsyncSession, pr_ids: Sequence[int], community_id: int):
+    """Render a community's review messages of all reports of the given
+    reported players, using a fixed number of queries."""
+    stmt = (
+        select(models.ReportMessage)
+            .join(models.ReportMessage.report)
+            .join(models.PlayerReport)
+            .where(
+                models.ReportMessage.community_id == community_id,
+                models.PlayerReport.id.in_(pr_ids)
             )
+            .distinct()
+    )
+    db_messages = (await db.scalars(stmt)).all()
+    if not db_messages:
+        return []
 
-            view = PlayerReviewView(responses, watchlisted_player_ids)
-            embed = await view.get_embed(report, responses)
+    db_reports = await get_reports_by_ids(db, {db_message.report_id for db_message in db_messages}, load_token=True)
+    reports = {
+        db_report.id: schemas.ReportWithToken.model_validate(db_report)
+        for db_report in db_reports
+    }
+
+    all_pr_ids = [player.id for report in reports.values() for player in report.players]
+    stmt = select(models.PlayerReportResponse).where(
+        models.PlayerReportResponse.community_id == community_id,
+        models.PlayerReportResponse.pr_id.in_(all_pr_ids)
+    ).options(
+        selectinload(models.PlayerReportResponse.player_report)
+            .selectinload(models.PlayerReport.report)
+            .selectinload(models.Report.token)
+    )
+    responses_by_pr_id = {
+        db_response.pr_id: schemas.PendingResponse.model_validate(db_response)
+        for db_response in await db.scalars(stmt)
+    }
 
+    watchlisted_player_ids = await filter_watchlisted_player_ids(
+        db,
+        player_ids={player.player_id for report in reports.values() for player in report.players},
+        community_id=community_id,
+    )
+
+    edits: list[tuple[schemas.ReportMessageRef, discord.Embed, PlayerReviewView]] = []
+    for db_message in db_messages:
+        report = reports.get(db_message.report_id)
+        if not report:
+            continue
+
+        responses = [
+            responses_by_pr_id[player.id]
+            for player in report.players
+            if player.id in responses_by_pr_id
+        ]
+        if not responses:
+            continue
+
+        view = PlayerReviewView(responses, {
+            player.player_id for player in report.players
+            if player.player_id in watchlisted_player_ids
+        })
+        embed = await view.get_embed(report, responses)
+        edits.append((schemas.ReportMessageRef.model_validate(db_message), embed, view))
+    return edits
+
+def _schedule_review_message_edits(
+        edits: list[tuple[schemas.ReportMessageRef, discord.Embed, PlayerReviewView]],
+        community_id: int,
+):
+    for message_data, embed, view in edits:
+        async def edit(message_data=message_data, embed=embed, view=view):
             try:
-                message = bot.get_partial_message(db_message.channel_id, db_message.message_id)
+                message = bot.get_partial_message(message_data.channel_id, message_data.message_id)
                 await message.edit(embed=embed, view=view)
             except discord.NotFound:
                 logger = get_logger(community_id)
-                logger.warn("Could not find message %s/%s", db_message.channel_id, db_message.message_id)
+                logger.warn("Could not find message %s/%s", message_data.channel_id, message_data.message_id)
 
-    await db.flush()
-    return affected_pr_ids
+        report_message_edits.schedule(message_data.channel_id, message_data.message_id, edit)
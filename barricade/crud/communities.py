@@ -1,20 +1,29 @@
+from functools import partial
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Load, selectinload
 
 from barricade import schemas
 from barricade.constants import MAX_ADMIN_LIMIT
-from barricade.db import models
+from barricade.bus import EventBus
+from barricade.db import models, on_commit
 from barricade.discord.audit import audit_community_admin_add, audit_community_admin_remove, audit_community_change_owner, audit_community_create, audit_community_edit
 from barricade.discord.communities import revoke_user_roles, update_user_roles
 from barricade.exceptions import (
     AdminNotAssociatedError, AlreadyExistsError, AdminOwnsCommunityError,
     MaxLimitReachedError, NotFoundError
 )
+from barricade.leader import Leadership
 from barricade.logger import get_logger
 from barricade.utils import safe_create_task
 
-async def get_all_admins(db: AsyncSession, load_relations: bool = False, limit: int = 100, offset: int = 0):
+async def get_all_admins(
+        db: AsyncSession,
+        load_relations: bool = False,
+        limit: int = 100,
+        offset: int = 0,
+        after: int | None = None,
+):
     """Retrieve all admins.
 
     Parameters
@@ -27,6 +36,9 @@ async def get_all_admins(db: AsyncSession, load_relations: bool = False, limit:
         The amount of results to return, by default 100
     offset : int, optional
         Offset where from to start returning results, by default 0
+    after : int, optional
+        The ID of an admin. If provided, only admins with a higher ID
+        are returned.
 
     Returns
     -------
@@ -38,7 +50,13 @@ async def get_all_admins(db: AsyncSession, load_relations: bool = False, limit:
     else:
         options = (selectinload(models.Admin.community), selectinload(models.Admin.owned_community))
 
-    stmt = select(models.Admin).limit(limit).offset(offset).options(*options)
+    stmt = select(models.Admin) \
+        .order_by(models.Admin.discord_id) \
+        .limit(limit).offset(offset).options(*options)
+
+    if after is not None:
+        stmt = stmt.where(models.Admin.discord_id > after)
+
     result = await db.scalars(stmt)
     return result.all()
 
@@ -67,7 +85,13 @@ async def get_admin_by_id(db: AsyncSession, discord_id: int, load_relations: boo
     return await db.get(models.Admin, discord_id, options=options)
 
 
-async def get_all_communities(db: AsyncSession, load_relations: bool = False, limit: int = 100, offset: int = 0):
+async def get_all_communities(
+        db: AsyncSession,
+        load_relations: bool = False,
+        limit: int = 100,
+        offset: int = 0,
+        after: int | None = None,
+):
     """Retrieve all communities.
 
     Parameters
@@ -80,6 +104,9 @@ async def get_all_communities(db: AsyncSession, load_relations: bool = False, li
         The amount of results to return, by default 100
     offset : int, optional
         Offset where from to start returning results, by default 0
+    after : int, optional
+        The ID of a community. If provided, only communities with a higher ID
+        are returned.
 
     Returns
     -------
@@ -91,7 +118,13 @@ async def get_all_communities(db: AsyncSession, load_relations: bool = False, li
     else:
         options = (selectinload(models.Community.admins), selectinload(models.Community.owner), selectinload(models.Community.integrations))
 
-    stmt = select(models.Community).limit(limit).offset(offset).options(*options)
+    stmt = select(models.Community) \
+        .order_by(models.Community.id) \
+        .limit(limit).offset(offset).options(*options)
+
+    if after is not None:
+        stmt = stmt.where(models.Community.id > after)
+
     result = await db.scalars(stmt)
     return result.all()
 
@@ -587,6 +620,9 @@ async def transfer_ownership(
 
     return True
 
+def _publish_integration_disable(integration_id: int):
+    EventBus().publish("integration_disable", integration_id)
+
 async def abandon_community(
         db: AsyncSession,
         community_id: int,
@@ -623,8 +659,12 @@ async def abandon_community(
         config = schemas.IntegrationConfig.model_validate(db_config)
         integration = manager.get_by_config(config)
         if not integration:
-            get_logger(db_community.id).error("Integration with config %r should be registered by manager but was not" % config)
             db_config.enabled = False
+            if Leadership().is_leader:
+                get_logger(db_community.id).error("Integration with config %r should be registered by manager but was not" % config)
+            else:
+                # Integrations are run by the leader
+                on_commit(db, partial(_publish_integration_disable, config.id))
             continue
 
         await integration.disable(force=True)
@@ -1,15 +1,16 @@
 from datetime import datetime, timezone
+from typing import Iterable, Sequence
 
-from sqlalchemy import exists, select
+from sqlalchemy import exists, func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Load, selectinload
 
 from barricade import schemas
 from barricade.crud.communities import get_admin_by_id
-from barricade.crud.responses import get_response_stats
+from barricade.crud.responses import bulk_get_response_stats
 from barricade.db import models
-from barricade.discord.audit import audit_report_create, audit_report_delete, audit_report_edit, audit_token_create
-from barricade.discord.reports import get_report_embed, get_report_channel
+from barricade.discord.audit import audit_report_delete, audit_report_edit, audit_token_create
 from barricade.enums import Platform
 from barricade.exceptions import InvalidPlatformError, NotFoundError, AlreadyExistsError
 from barricade.hooks import EventHooks
@@ -104,9 +105,10 @@ async def get_all_reports(
         community_id: int | None = None,
         load_token: bool = False,
         limit: int = 100,
-        offset: int = 0
+        offset: int = 0,
+        after: tuple[datetime, int] | None = None,
 ):
-    """Retrieve all reports.
+    """Retrieve all reports, ordered by creation date.
 
     Parameters
     ----------
@@ -120,6 +122,10 @@ async def get_all_reports(
         The amount of results to return, by default 100
     offset : int, optional
         Offset where from to start returning results, by default 0
+    after : tuple[datetime, int], optional
+        The creation date and ID of a report. If provided, only reports
+        that come after it are returned. Unlike an offset, this remains
+        fast regardless of how far into the results it points.
 
     Returns
     -------
@@ -131,7 +137,13 @@ async def get_all_reports(
     else:
         options = (selectinload(models.Report.players),)
 
-    stmt = select(models.Report).limit(limit).offset(offset).options(*options)
+    stmt = select(models.Report) \
+        .order_by(models.Report.created_at, models.Report.id) \
+        .limit(limit).offset(offset).options(*options)
+
+    if after is not None:
+        key = (models.Report.created_at, models.Report.id)
+        stmt = stmt.where(tuple_(*key) > tuple_(*after, types=[column.type for column in key]))
 
     if community_id is not None:
         stmt = stmt.join(models.Report.token).where(models.ReportToken.community_id == community_id)
@@ -169,6 +181,34 @@ async def get_report_by_id(db: AsyncSession, report_id: int, load_token: bool =
 
     return await db.get(models.Report, report_id, options=options)
 
+async def get_reports_by_ids(db: AsyncSession, report_ids: Iterable[int], load_token: bool = False):
+    """Look up multiple reports by their IDs.
+
+    Parameters
+    ----------
+    db : AsyncSession
+        An asynchronous database session
+    report_ids : Iterable[int]
+        The IDs of the reports
+    load_token : bool, optional
+        Whether to also load the relational token property, by default False
+
+    Returns
+    -------
+    Sequence[Report]
+        A sequence of report models. Reports that do not exist are omitted.
+    """
+    if load_token:
+        options = (selectinload(models.Report.players), selectinload(models.Report.token))
+    else:
+        options = (selectinload(models.Report.players),)
+
+    stmt = select(models.Report) \
+        .where(models.Report.id.in_(list(report_ids))) \
+        .options(*options)
+    result = await db.scalars(stmt)
+    return result.all()
+
 async def get_reports_for_player(db: AsyncSession, player_id: str, load_token: bool = False):
     """Get all reports of a player
 
@@ -213,6 +253,10 @@ async def create_report(
     This method will automatically commit after successfully creating
     a report!
 
+    The report's public message is not sent right away. Instead, the
+    report is queued in the outbox, and its `message_id` remains 0 until
+    the message is sent, after which the report_create hooks are invoked.
+
     Parameters
     ----------
     db : AsyncSession
@@ -231,45 +275,36 @@ async def create_report(
         "message_id": 0
     })
 
-    db_players = []
-    for player in params.players:
-        # This flushes, and since we don't want a partially initialized report
-        # flushed, we do this first.
-        db_player, _ = await get_or_create_player(db, schemas.PlayerCreateParams(
+    # This flushes, and since we don't want a partially initialized report
+    # flushed, we do this first.
+    db_players = await bulk_upsert_players(db, [
+        schemas.PlayerCreateParams(
             id=player.player_id,
             bm_rcon_url=player.bm_rcon_url
-        ))
-        db_players.append(db_player)
-        # player.bm_rcon_url = db_player.bm_rcon_url
+        )
+        for player in params.players
+    ])
 
     db_report = models.Report(**report_payload)
-    for player, db_player in zip(params.players, db_players):
+    for player in params.players:
         models.PlayerReport(
             report=db_report,
-            player=db_player,
+            player=db_players[player.player_id],
             player_name=player.player_name,
         )
 
     db.add(db_report)
+    db.add(models.ReportOutboxEntry(
+        report_id=db_report.id,
+        created_by=by,
+    ))
     await db.flush()
 
     db_report = await get_report_by_id(db, db_report.id, load_token=True)
     if not db_report:
         raise RuntimeError("Report no longer exists")
 
-    report = schemas.ReportWithToken.model_validate(db_report)
-
-    embed = await get_report_embed(report)
-    channel = get_report_channel(report.token.platform)
-    message = await channel.send(embed=embed)
-    db_report.message_id = message.id
-
     await db.commit()
-    EventHooks.invoke_report_create(report)
-    safe_create_task(
-        audit_report_create(report, by=by)
-    )
-
     return db_report
 
 async def edit_report(
@@ -289,6 +324,16 @@ async def edit_report(
         for db_pr in db_report.players
     }
     
+    # Create all submitted players and update their attributes, including
+    # those of players that were already part of the report.
+    db_players = await bulk_upsert_players(db, [
+        schemas.PlayerCreateParams(
+            id=player.player_id,
+            bm_rcon_url=player.bm_rcon_url
+        )
+        for player in report.players
+    ])
+
     # Iterate over all submitted players
     for player in report.players:
         db_pr = db_prs.pop(player.player_id, None)
@@ -296,17 +341,11 @@ async def edit_report(
             # Player already existed, update their attributes and take them out
             # of the index.
             db_pr.player_name = player.player_name
-            if player.bm_rcon_url:
-                db_pr.player.bm_rcon_url = player.bm_rcon_url
         else:
             # Player did not yet exist, add to report
-            db_player, _ = await get_or_create_player(db, schemas.PlayerCreateParams(
-                id=player.player_id,
-                bm_rcon_url=player.bm_rcon_url
-            ))
             db_pr = models.PlayerReport(
                 report=db_report,
-                player=db_player,
+                player=db_players[player.player_id],
                 player_name=player.player_name,
             )
             # db_report.players.append(db_pr)
@@ -327,7 +366,7 @@ async def edit_report(
     new_report = schemas.ReportWithRelations.model_validate(db_report)
     if (new_report != old_report):
         # Only invoke if something actually changed
-        EventHooks.invoke_report_edit(new_report, old_report)
+        EventHooks.invoke_report_edit(new_report, old_report, db=db)
         safe_create_task(
             audit_report_edit(new_report, by=by)
         )
@@ -345,10 +384,10 @@ async def delete_report(
         raise NotFoundError("No report exists with ID %s" % report_id)
     
     # Retrieve stats for auditing
-    stats: dict[int, schemas.ResponseStats] = {}
-    for db_pr in db_report.players:
-        pr = schemas.PlayerReportRef.model_validate(db_pr)
-        stats[pr.id] = await get_response_stats(db, pr)
+    stats = await bulk_get_response_stats(db, [
+        schemas.PlayerReportRef.model_validate(db_pr)
+        for db_pr in db_report.players
+    ])
 
     # Delete it
     await db.delete(db_report)
@@ -356,7 +395,7 @@ async def delete_report(
 
     # Invoke hooks and audit
     report = schemas.ReportWithRelations.model_validate(db_report)
-    EventHooks.invoke_report_delete(report)
+    EventHooks.invoke_report_delete(report, db=db)
     safe_create_task(
         audit_report_delete(report, stats, by=by)
     )
@@ -409,6 +448,50 @@ async def get_or_create_player(db: AsyncSession, player: schemas.PlayerCreatePar
     
     return db_player, created
 
+async def bulk_upsert_players(db: AsyncSession, players: Sequence[schemas.PlayerCreateParams]):
+    """Create multiple players at once, using a single query. Players that
+    already exist have their attributes updated instead, except for
+    attributes that were left empty.
+
+    Parameters
+    ----------
+    db : AsyncSession
+        An asynchronous database session
+    players : Sequence[schemas.PlayerCreateParams]
+        Payloads
+
+    Returns
+    -------
+    dict[str, Player]
+        A mapping of player IDs to player models
+    """
+    # Remove duplicates, preferring non-empty attributes. Rows are also
+    # sorted so that concurrent upserts lock them in the same order.
+    payloads: dict[str, dict] = {}
+    for player in players:
+        payload = payloads.setdefault(player.id, player.model_dump())
+        if player.bm_rcon_url:
+            payload["bm_rcon_url"] = player.bm_rcon_url
+
+    if not payloads:
+        return {}
+
+    stmt = insert(models.Player).values(
+        [payloads[player_id] for player_id in sorted(payloads)]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["id"],
+        set_={
+            "bm_rcon_url": func.coalesce(
+                func.nullif(stmt.excluded.bm_rcon_url, ""),
+                models.Player.bm_rcon_url
+            ),
+        }
+    ).returning(models.Player)
+
+    result = await db.scalars(stmt, execution_options={"populate_existing": True})
+    return {db_player.id: db_player for db_player in result}
+
 async def get_report_message_by_community_id(db: AsyncSession, report_id: int, community_id: int | None):
     """Look up a report by its ID.
 
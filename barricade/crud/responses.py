@@ -1,5 +1,7 @@
+from collections import Counter
 from typing import Sequence
-from sqlalchemy import exists, not_, select, func
+from sqlalchemy import delete, exists, literal, not_, select, func, union_all
+from sqlalchemy.dialects.postgresql import insert
 import sqlalchemy.exc
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
@@ -11,6 +13,81 @@ from barricade.exceptions import NotFoundError
 from barricade.hooks import EventHooks
 from barricade.logger import get_logger
 
+_REJECT_REASON_STATS_COLUMNS = {
+    ReportRejectReason.INSUFFICIENT: "num_rejected_insufficient",
+    ReportRejectReason.INCONCLUSIVE: "num_rejected_inconclusive",
+}
+
+def _get_response_stats_columns(banned: bool, reject_reason: ReportRejectReason | None) -> list[str]:
+    if banned:
+        return ["num_banned"]
+    elif reject_reason:
+        return ["num_rejected", _REJECT_REASON_STATS_COLUMNS[reject_reason]]
+    else:
+        return ["num_rejected"]
+
+async def increment_response_stats(db: AsyncSession, pr_ids: Sequence[int], **increments: int):
+    """Increment (or decrement) the response statistics of one or more
+    reported players, creating their statistics if they do not exist yet.
+
+    Parameters
+    ----------
+    db : AsyncSession
+        An asynchronous database session
+    pr_ids : Sequence[int]
+        The IDs of the player reports whose statistics to update
+    **increments : int
+        The amount to add to each column
+    """
+    increments = {column: amount for column, amount in increments.items() if amount}
+    if not pr_ids or not increments:
+        return
+
+    stmt = insert(models.PlayerReportStats).values([
+        dict(pr_id=pr_id, **increments)
+        for pr_id in pr_ids
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.PlayerReportStats.pr_id],
+        set_={
+            column: getattr(models.PlayerReportStats, column) + getattr(stmt.excluded, column)
+            for column in increments
+        }
+    )
+    await db.execute(stmt)
+
+async def rebuild_response_stats(db: AsyncSession):
+    """Recalculate the response statistics of all reported players from
+    scratch, replacing any existing statistics.
+
+    Parameters
+    ----------
+    db : AsyncSession
+        An asynchronous database session
+    """
+    prr = models.PlayerReportResponse
+    await db.execute(delete(models.PlayerReportStats))
+    await db.execute(
+        insert(models.PlayerReportStats).from_select(
+            [
+                "pr_id",
+                "num_banned",
+                "num_rejected",
+                *_REJECT_REASON_STATS_COLUMNS.values(),
+            ],
+            select(
+                prr.pr_id,
+                func.count().filter(prr.banned.is_(True)),
+                func.count().filter(prr.banned.is_(False)),
+                *(
+                    func.count().filter(prr.banned.is_(False), prr.reject_reason == reject_reason)
+                    for reject_reason in _REJECT_REASON_STATS_COLUMNS
+                ),
+            ).group_by(prr.pr_id)
+        )
+    )
+    await db.flush()
+
 async def set_report_response(db: AsyncSession, params: schemas.ResponseCreateParams):
     """Set or change a community's response to a reported player.
 
@@ -35,9 +112,12 @@ async def set_report_response(db: AsyncSession, params: schemas.ResponseCreatePa
         selectinload(models.PlayerReportResponse.player_report)
             .selectinload(models.PlayerReport.report)
             .selectinload(models.Report.token)
-    ).limit(1)
+    ).limit(1).with_for_update()
     db_prr = await db.scalar(stmt)
 
+    # Work out how the response statistics change
+    increments = Counter(_get_response_stats_columns(params.banned, params.reject_reason))
+
     if not db_prr:
         db_prr = models.PlayerReportResponse(**params.model_dump())
         db.add(db_prr)
@@ -45,20 +125,22 @@ async def set_report_response(db: AsyncSession, params: schemas.ResponseCreatePa
             await db.flush()
         except sqlalchemy.exc.IntegrityError:
             raise NotFoundError("Report or community no longer exists")
-        await db.commit()
+        await increment_response_stats(db, [db_prr.pr_id], **increments)
         await db.refresh(db_prr)
         await db_prr.player_report.report.awaitable_attrs.token
 
     else:
+        increments.subtract(_get_response_stats_columns(db_prr.banned, db_prr.reject_reason))
         db_prr.banned = params.banned
         db_prr.reject_reason = params.reject_reason
-        await db.commit()
+        await increment_response_stats(db, [db_prr.pr_id], **increments)
 
     prr = schemas.ResponseWithToken.model_validate(db_prr)
     if prr.banned:
-        EventHooks.invoke_player_ban(prr)
+        EventHooks.invoke_player_ban(prr, db=db)
     else:
-        EventHooks.invoke_player_unban(prr)
+        EventHooks.invoke_player_unban(prr, db=db)
+    await db.commit()
     
     logger = get_logger(prr.community_id)
     logger.info(
@@ -68,6 +150,26 @@ async def set_report_response(db: AsyncSession, params: schemas.ResponseCreatePa
 
     return db_prr
 
+async def is_response_banned(db: AsyncSession, response_id: int) -> bool:
+    """Check whether a response currently bans its player.
+
+    Parameters
+    ----------
+    db : AsyncSession
+        An asynchronous database session
+    response_id : int
+        The ID of the response
+
+    Returns
+    -------
+    bool
+        Whether the response exists and bans its player
+    """
+    stmt = select(models.PlayerReportResponse.banned).where(
+        models.PlayerReportResponse.id == response_id
+    )
+    return bool(await db.scalar(stmt))
+
 async def get_community_responses_to_report(db: AsyncSession, report: schemas.Report, community_id: int):
     """Get all of a community's responses to a specific report.
 
@@ -99,79 +201,167 @@ async def get_community_responses_to_report(db: AsyncSession, report: schemas.Re
     return result.all()
 
 async def get_response_stats(db: AsyncSession, player_report: schemas.PlayerReportRef) -> schemas.ResponseStats:
-    stmt = select(
-        models.PlayerReportResponse.banned,
-        models.PlayerReportResponse.reject_reason,
-        func.count(models.PlayerReportResponse.pr_id).label("amount")
-    ).where(
-        models.PlayerReportResponse.pr_id == player_report.id
-    ).group_by(
-        models.PlayerReportResponse.banned,
-        models.PlayerReportResponse.reject_reason,
-    )
+    """Get the response statistics of a single reported player.
 
-    results = await db.execute(stmt)
-    data = schemas.ResponseStats(
-        num_banned=0,
-        num_rejected=0,
-        reject_reasons={
-            reject_reason: 0
-            for reject_reason in ReportRejectReason
-        }
+    Parameters
+    ----------
+    db : AsyncSession
+        An asynchronous database session
+    player_report : schemas.PlayerReportRef
+        The reported player
+
+    Returns
+    -------
+    schemas.ResponseStats
+        The player's response statistics
+    """
+    stats = await bulk_get_response_stats(db, [player_report])
+    return stats[player_report.id]
+
+async def bulk_get_response_stats(db: AsyncSession, players: Sequence[schemas.PlayerReportRef]) -> dict[int, schemas.ResponseStats]:
+    """Get the response statistics of multiple reported players using
+    a single query. Players without any responses have all their
+    statistics set to zero.
+
+    Parameters
+    ----------
+    db : AsyncSession
+        An asynchronous database session
+    players : Sequence[schemas.PlayerReportRef]
+        The reported players
+
+    Returns
+    -------
+    dict[int, schemas.ResponseStats]
+        A mapping of player report IDs to their response statistics
+    """
+    stats = {
+        player.id: schemas.ResponseStats(
+            num_banned=0,
+            num_rejected=0,
+            reject_reasons={
+                reject_reason: 0
+                for reject_reason in ReportRejectReason
+            }
+        )
+        for player in players
+    }
+    if not stats:
+        return stats
+
+    stmt = select(models.PlayerReportStats).where(
+        models.PlayerReportStats.pr_id.in_(stats.keys())
     )
 
+    results = await db.scalars(stmt)
     for result in results:
-        if result.banned:
-            data.num_banned = result.amount
-        else:
-            data.num_rejected += result.amount
-            if result.reject_reason:
-                data.reject_reasons[result.reject_reason] += result.amount
+        data = stats[result.pr_id]
+        data.num_banned = result.num_banned
+        data.num_rejected = result.num_rejected
+        for reject_reason, column in _REJECT_REASON_STATS_COLUMNS.items():
+            data.reject_reasons[reject_reason] = getattr(result, column)
 
-    return data
-
-async def bulk_get_response_stats(db: AsyncSession, players: Sequence[schemas.PlayerReportRef]) -> dict[int, schemas.ResponseStats]:
-    stats: dict[int, schemas.ResponseStats] = {}
-    for player in players:
-        stats[player.id] = await get_response_stats(db, player)
     return stats
 
+async def bulk_get_response_stats_for_reports(
+        db: AsyncSession,
+        reports: Sequence[schemas.Report],
+) -> dict[int, dict[int, schemas.ResponseStats]]:
+    """Get the response statistics of all players of multiple reports
+    using a single query.
+
+    Parameters
+    ----------
+    db : AsyncSession
+        An asynchronous database session
+    reports : Sequence[schemas.Report]
+        The reports
+
+    Returns
+    -------
+    dict[int, dict[int, schemas.ResponseStats]]
+        A mapping of report IDs to mappings of player report IDs to
+        their response statistics
+    """
+    stats = await bulk_get_response_stats(db, [
+        player
+        for report in reports
+        for player in report.players
+    ])
+    return {
+        report.id: {
+            player.id: stats[player.id]
+            for player in report.players
+        }
+        for report in reports
+    }
+
 async def get_pending_responses(
         db: AsyncSession,
         community: schemas.CommunityRef,
         player_reports: list[schemas.PlayerReportRef],
 ):
+    responses = await bulk_get_pending_responses(db, [community], player_reports)
+    return responses[community.id]
+
+async def bulk_get_pending_responses(
+        db: AsyncSession,
+        communities: Sequence[schemas.CommunityRef],
+        player_reports: Sequence[schemas.PlayerReportRef],
+) -> dict[int, list[schemas.PendingResponse]]:
+    """Get the responses of multiple communities to multiple reported players
+    using a single query. Players a community has not responded to yet are
+    given an empty response.
+
+    Parameters
+    ----------
+    db : AsyncSession
+        An asynchronous database session
+    communities : Sequence[schemas.CommunityRef]
+        The communities whose responses to get
+    player_reports : Sequence[schemas.PlayerReportRef]
+        The reported players
+
+    Returns
+    -------
+    dict[int, list[schemas.PendingResponse]]
+        A mapping of community IDs to their responses, in the same order
+        as the given players
+    """
     responses = {
-        pr.id: schemas.PendingResponse(
-            pr_id=pr.id,
-            player_report=pr,
-            community_id=community.id,
-            community=community,
-        ) for pr in player_reports
+        community.id: {
+            pr.id: schemas.PendingResponse(
+                pr_id=pr.id,
+                player_report=pr,
+                community_id=community.id,
+                community=community,
+            ) for pr in player_reports
+        } for community in communities
     }
-    
+    if not responses or not player_reports:
+        return {community_id: list(pending.values()) for community_id, pending in responses.items()}
+
     stmt = select(
         models.PlayerReportResponse.pr_id,
+        models.PlayerReportResponse.community_id,
         models.PlayerReportResponse.reject_reason,
         models.PlayerReportResponse.banned,
         models.PlayerReportResponse.responded_by,
-    ).join(
-        models.PlayerReport
     ).where(
-        models.PlayerReportResponse.community_id == community.id,
-        models.PlayerReport.id.in_(
+        models.PlayerReportResponse.community_id.in_(responses.keys()),
+        models.PlayerReportResponse.pr_id.in_(
             [pr.id for pr in player_reports]
         )
-    ).limit(len(player_reports))
+    )
     result = await db.execute(stmt)
     for row in result:
-        response = responses[row.pr_id]
+        response = responses[row.community_id][row.pr_id]
 
         response.banned = row.banned
         response.reject_reason = row.reject_reason
         response.responded_by = row.responded_by
-    
-    return list(responses.values())
+
+    return {community_id: list(pending.values()) for community_id, pending in responses.items()}
 
 async def get_reports_for_player_with_no_community_review(
         db: AsyncSession,
@@ -222,6 +412,88 @@ async def get_reports_for_player_with_no_community_review(
     result = await db.scalars(stmt)
     return result.all()
 
+async def classify_players_for_community_alerts(
+        db: AsyncSession,
+        player_ids: Sequence[str],
+        community_id: int,
+        reasons_filter: ReportReasonFlag | None = None
+) -> schemas.PlayerAlertClassification:
+    """Determine in a single query which of the given players a community
+    should be alerted about.
+
+    A player is considered watchlisted if the community has them on its
+    watchlist, in which case all of their reports are included. Otherwise
+    a player is considered unreviewed if they have reports from other
+    communities that the community has not yet responded to.
+
+    Parameters
+    ----------
+    db : AsyncSession
+        An asynchronous database session
+    player_ids : Sequence[str]
+        The IDs of the players
+    community_id : int
+        The ID of the community
+    reasons_filter : ReportReasonFlag | None
+        Filter out unreviewed reports whose reasons do not overlap with the
+        filter. If None, no filter will be applied. By default None.
+
+    Returns
+    -------
+    schemas.PlayerAlertClassification
+        The watchlisted and unreviewed players and their relevant reports
+    """
+    classification = schemas.PlayerAlertClassification()
+    if not player_ids:
+        return classification
+
+    is_watchlisted = exists().where(
+        models.PlayerWatchlist.player_id == models.PlayerReport.player_id,
+        models.PlayerWatchlist.community_id == community_id,
+    )
+
+    watchlisted_stmt = select(
+        models.PlayerReport.player_id,
+        models.PlayerReport.report_id,
+        literal(True).label("watchlisted"),
+    ).where(
+        models.PlayerReport.player_id.in_(player_ids),
+        is_watchlisted,
+    )
+
+    unreviewed_stmt = select(
+        models.PlayerReport.player_id,
+        models.PlayerReport.report_id,
+        literal(False).label("watchlisted"),
+    ).join(
+        models.PlayerReport.report
+    ).join(
+        models.Report.token
+    ).where(
+        models.PlayerReport.player_id.in_(player_ids),
+        models.ReportToken.community_id != community_id,
+        not_(is_watchlisted),
+        not_(
+            exists().where(
+                models.PlayerReportResponse.community_id == community_id,
+                models.PlayerReportResponse.pr_id == models.PlayerReport.id
+            )
+        )
+    )
+    if reasons_filter is not None:
+        unreviewed_stmt = unreviewed_stmt.where(
+            models.Report.reasons_bitflag.bitwise_and(reasons_filter) != 0
+        )
+
+    result = await db.execute(union_all(watchlisted_stmt, unreviewed_stmt))
+    for row in result:
+        if row.watchlisted:
+            classification.watchlisted.setdefault(row.player_id, []).append(row.report_id)
+        else:
+            classification.unreviewed.setdefault(row.player_id, []).append(row.report_id)
+
+    return classification
+
 async def get_successful_responses_without_bans(db: AsyncSession, community_id: int, integration_id: int):
     """Find all players that an integration has not banned yet, that should
     be banned. Returns one response with token for each player found.
@@ -6,8 +6,9 @@ from sqlalchemy.orm import Load
 from typing import Iterable
 
 from barricade import schemas
-from barricade.db import models
+from barricade.db import models, on_commit
 from barricade.exceptions import AlreadyExistsError
+from barricade.indexes import PlayerIndex
 
 async def get_watchlist_by_id(db: AsyncSession, watchlist_id: int, load_relations: bool = False):
     """Look up a watchlist by its ID.
@@ -75,8 +76,18 @@ async def create_watchlist(db: AsyncSession, watchlist: schemas.PlayerWatchlistC
         await db.flush()
     except IntegrityError:
         raise AlreadyExistsError("Player is already watchlisted")
+
+    on_commit(db, lambda: PlayerIndex().add_watchlisted_player(watchlist.community_id, watchlist.player_id))
     return db_watchlist
 
+async def delete_watchlist(db: AsyncSession, db_watchlist: models.PlayerWatchlist):
+    community_id = db_watchlist.community_id
+    player_id = db_watchlist.player_id
+    await db.delete(db_watchlist)
+    await db.flush()
+
+    on_commit(db, lambda: PlayerIndex().discard_watchlisted_player(community_id, player_id))
+
 async def bulk_create_watchlists(db: AsyncSession, watchlists: list[schemas.PlayerWatchlistCreateParams]):
     if not watchlists:
         return
@@ -89,11 +100,54 @@ async def bulk_create_watchlists(db: AsyncSession, watchlists: list[schemas.Play
     await db.execute(stmt)
     await db.flush()
 
+    def add_to_index():
+        for watchlist in watchlists:
+            PlayerIndex().add_watchlisted_player(watchlist.community_id, watchlist.player_id)
+    on_commit(db, add_to_index)
+
 async def bulk_delete_watchlists(db: AsyncSession, *where_clauses):
-    stmt = delete(models.PlayerWatchlist).where(*where_clauses)
-    await db.execute(stmt)
+    stmt = delete(models.PlayerWatchlist).where(*where_clauses).returning(
+        models.PlayerWatchlist.community_id,
+        models.PlayerWatchlist.player_id,
+    )
+    result = await db.execute(stmt)
+    deleted = result.all()
     await db.flush()
 
+    def discard_from_index():
+        for community_id, player_id in deleted:
+            PlayerIndex().discard_watchlisted_player(community_id, player_id)
+    on_commit(db, discard_from_index)
+
 async def filter_watchlisted_player_ids(db: AsyncSession, player_ids: Iterable[str], community_id: int):
     db_watchlists = await bulk_get_watchlists_by_player_and_community(db, player_ids, community_id)
     return {db_watchlist.player_id for db_watchlist in db_watchlists}
+
+async def bulk_filter_watchlisted_player_ids(db: AsyncSession, player_ids: Iterable[str], community_ids: Iterable[int]):
+    """Determine which of the given players are watchlisted by each of the
+    given communities, using a single query.
+
+    Parameters
+    ----------
+    db : AsyncSession
+        An asynchronous database session
+    player_ids : Iterable[str]
+        The IDs of the players
+    community_ids : Iterable[int]
+        The IDs of the communities
+
+    Returns
+    -------
+    dict[int, set[str]]
+        A mapping of community IDs to the IDs of the players they watchlisted
+    """
+    community_ids = list(community_ids)
+    watchlisted: dict[int, set[str]] = {community_id: set() for community_id in community_ids}
+    stmt = select(models.PlayerWatchlist.community_id, models.PlayerWatchlist.player_id).where(
+        models.PlayerWatchlist.player_id.in_(list(player_ids)),
+        models.PlayerWatchlist.community_id.in_(community_ids),
+    )
+    result = await db.execute(stmt)
+    for community_id, player_id in result:
+        watchlisted[community_id].add(player_id)
+    return watchlisted
@@ -1,14 +1,74 @@
 from fastapi import Depends
+import logging
+from sqlalchemy import event, exc, func, select
 from sqlalchemy.ext.asyncio import AsyncAttrs, AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.orm import DeclarativeBase
-from typing import Annotated
+from sqlalchemy.orm import DeclarativeBase, Session, SessionTransaction
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+import time
+from typing import Annotated, Callable
 
-from barricade.constants import DB_URL
+from barricade import metrics
+from barricade.constants import (
+    DB_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_STATEMENT_CACHE_SIZE
+)
+
+# Advisory lock held while creating tables, so that processes starting at the same time do not conflict
+CREATE_TABLES_LOCK_ID = 0x74626c73 # "tbls"
 
 class ModelBase(AsyncAttrs, DeclarativeBase):
     pass
 
-engine = create_async_engine(DB_URL)
+class _InstrumentedPool(AsyncAdaptedQueuePool):
+    """A connection pool that records how long it takes to check out
+    connections, which includes any time spent waiting for one to
+    become available."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._checkout_duration = metrics.histogram(
+            "db.pool.checkout_duration",
+            "Time (in seconds) spent waiting to obtain a database connection",
+        )
+        self._timeouts = metrics.counter(
+            "db.pool.timeouts",
+            "Number of times no database connection became available in time",
+        )
+        # Pools are replaced when the engine is disposed, so always point
+        # the gauges at the most recently created pool
+        metrics.gauge(
+            "db.pool.checked_out",
+            "Number of database connections currently in use",
+        ).getter = self.checkedout
+        metrics.gauge(
+            "db.pool.overflow",
+            "Number of database connections currently open on top of the pool size",
+        ).getter = lambda: max(self.overflow(), 0)
+
+    def _do_get(self):
+        start = time.monotonic()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self._timeouts.inc()
+            raise
+        finally:
+            self._checkout_duration.observe(time.monotonic() - start)
+
+engine = create_async_engine(
+    DB_URL,
+    poolclass=_InstrumentedPool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    connect_args={
+        # Cache used by SQLAlchemy for prepared statements
+        "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        # Cache used by asyncpg itself
+        "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+    },
+)
 """Asynchronous database engine"""
 
 session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
@@ -21,6 +81,34 @@ FastAPI routes should use the get_db generator as a
 dependency instead.
 """
 
+def on_commit(db: AsyncSession | Session, callback: Callable[[], None]):
+    """Schedule a callback to be called once the session's current
+    transaction is committed. If the transaction is rolled back
+    instead, the callback is discarded.
+
+    Parameters
+    ----------
+    db : AsyncSession | Session
+        A database session
+    callback : Callable[[], None]
+        The callback
+    """
+    session = db.sync_session if isinstance(db, AsyncSession) else db
+    session.info.setdefault("on_commit", []).append(callback)
+
+@event.listens_for(Session, "after_commit")
+def _invoke_on_commit_callbacks(session: Session):
+    for callback in session.info.pop("on_commit", ()):
+        try:
+            callback()
+        except Exception:
+            logging.exception("Failed to invoke on_commit callback %r", callback)
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_on_commit_callbacks(session: Session, transaction: SessionTransaction):
+    if transaction.parent is None:
+        session.info.pop("on_commit", None)
+
 # Dependency for FastAPI
 async def get_db():
     """Database dependency for use in FastAPI. Use
@@ -44,6 +132,7 @@ async def create_tables():
     """
     # Load all models
     import barricade.db.models # type: ignore
-    # Create the tables
+    # Create the tables, one process at a time
     async with engine.begin() as db:
+        await db.execute(select(func.pg_advisory_xact_lock(CREATE_TABLES_LOCK_ID)))
         await db.run_sync(ModelBase.metadata.create_all)
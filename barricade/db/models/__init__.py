@@ -1,13 +1,16 @@
 # type: ignore
 from barricade.db.models.admin import Admin
 from barricade.db.models.community import Community
+from barricade.db.models.hook_delivery import HookDelivery
 from barricade.db.models.player_ban import PlayerBan
 from barricade.db.models.player_report_response import PlayerReportResponse
 from barricade.db.models.player_report import PlayerReport
+from barricade.db.models.player_report_stats import PlayerReportStats
 from barricade.db.models.player_watchlist import PlayerWatchlist
 from barricade.db.models.player import Player
 from barricade.db.models.report_token import ReportToken
 from barricade.db.models.report_message import ReportMessage
+from barricade.db.models.report_outbox_entry import ReportOutboxEntry
 from barricade.db.models.report import Report
 from barricade.db.models.integration import Integration
 from barricade.db.models.web_token import WebToken
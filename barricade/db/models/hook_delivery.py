@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import Any, Optional
+
+from barricade.db import ModelBase
+
+from sqlalchemy import TIMESTAMP, BigInteger, String, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+class HookDelivery(ModelBase):
+    """A pending invocation of a hook, created for each hook of an event."""
+    __tablename__ = "hook_deliveries"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    event: Mapped[str] = mapped_column(String)
+    hook: Mapped[str] = mapped_column(String)
+    args: Mapped[list[Any]] = mapped_column(JSONB)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP(True), server_default=func.now())
+    attempts: Mapped[int] = mapped_column(default=0, server_default="0")
+    # When the next attempt is due. None if the delivery was given up on.
+    next_attempt_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(True), server_default=func.now(), index=True)
+    last_error: Mapped[Optional[str]]
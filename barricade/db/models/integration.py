@@ -1,7 +1,9 @@
+from datetime import datetime
+
 from barricade.db import ModelBase
 from barricade.enums import IntegrationType
 
-from sqlalchemy import Integer, Boolean, ForeignKey, Enum
+from sqlalchemy import Integer, Boolean, ForeignKey, Enum, TIMESTAMP
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from typing import Optional, TYPE_CHECKING
@@ -25,5 +27,10 @@ class Integration(ModelBase):
     # Battlemetrics
     organization_id: Mapped[Optional[str]]
 
+    # The last time a ban was updated that the ban list was synchronized with
+    bans_synced_until: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(True))
+    # The last time the entire ban list was synchronized
+    bans_fully_synced_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(True))
+
     community: Mapped['Community'] = relationship(back_populates="integrations")
     bans: Mapped[list['PlayerBan']] = relationship(back_populates="integration", cascade="all, delete-orphan")
@@ -1,9 +1,11 @@
+from datetime import datetime
+
 from barricade.db import ModelBase
 
-from sqlalchemy import Integer, ForeignKey, UniqueConstraint
+from sqlalchemy import Integer, ForeignKey, Index, UniqueConstraint, TIMESTAMP
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from typing import TYPE_CHECKING
+from typing import Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from .integration import Integration
@@ -17,11 +19,15 @@ class PlayerBan(ModelBase):
     integration_id: Mapped[int] = mapped_column(ForeignKey("integrations.id", ondelete="CASCADE"))
 
     remote_id: Mapped[str]
+    # When the ban expires remotely, as of the last time it was synchronized
+    expires_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(True))
 
     player: Mapped['Player'] = relationship(back_populates="bans")
     integration: Mapped['Integration'] = relationship(back_populates="bans")
 
     __table_args__ = (
         UniqueConstraint('player_id', 'integration_id'),
+        # Used to look up bans that changed remotely
+        Index('ix_player_bans_integration_id_remote_id', 'integration_id', 'remote_id'),
     )
 
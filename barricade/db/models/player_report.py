@@ -14,8 +14,8 @@ class PlayerReport(ModelBase):
     __tablename__ = "player_reports"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    player_id: Mapped[str] = mapped_column(ForeignKey("players.id"))
-    report_id: Mapped[int] = mapped_column(ForeignKey("reports.id"))
+    player_id: Mapped[str] = mapped_column(ForeignKey("players.id"), index=True)
+    report_id: Mapped[int] = mapped_column(ForeignKey("reports.id"), index=True)
     player_name: Mapped[str]
 
     report: Mapped['Report'] = relationship(back_populates="players", lazy="selectin")
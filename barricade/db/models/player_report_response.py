@@ -15,7 +15,7 @@ class PlayerReportResponse(ModelBase):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     pr_id: Mapped[int] = mapped_column(ForeignKey("player_reports.id", ondelete="CASCADE"))
-    community_id: Mapped[int] = mapped_column(ForeignKey("communities.id"))
+    community_id: Mapped[int] = mapped_column(ForeignKey("communities.id"), index=True)
     banned: Mapped[bool]
     reject_reason: Mapped[Optional[ReportRejectReason]] = mapped_column(Enum(ReportRejectReason), nullable=True)
     responded_by: Mapped[Optional[str]]
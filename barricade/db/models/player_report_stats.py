@@ -0,0 +1,13 @@
+from barricade.db import ModelBase
+
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+class PlayerReportStats(ModelBase):
+    __tablename__ = "player_report_stats"
+
+    pr_id: Mapped[int] = mapped_column(ForeignKey("player_reports.id", ondelete="CASCADE"), primary_key=True)
+    num_banned: Mapped[int] = mapped_column(default=0, server_default="0")
+    num_rejected: Mapped[int] = mapped_column(default=0, server_default="0")
+    num_rejected_insufficient: Mapped[int] = mapped_column(default=0, server_default="0")
+    num_rejected_inconclusive: Mapped[int] = mapped_column(default=0, server_default="0")
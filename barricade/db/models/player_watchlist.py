@@ -14,7 +14,7 @@ class PlayerWatchlist(ModelBase):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     player_id: Mapped[str] = mapped_column(ForeignKey("players.id"))
-    community_id: Mapped[int] = mapped_column(ForeignKey("communities.id", ondelete="CASCADE"))
+    community_id: Mapped[int] = mapped_column(ForeignKey("communities.id", ondelete="CASCADE"), index=True)
 
     player: Mapped['Player'] = relationship(back_populates="watchlists")
     community: Mapped['Community'] = relationship(back_populates="watchlists")
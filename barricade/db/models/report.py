@@ -2,7 +2,7 @@ from datetime import datetime
 
 from barricade.db import ModelBase
 
-from sqlalchemy import Integer, BigInteger, String, ForeignKey, TIMESTAMP, ARRAY, func
+from sqlalchemy import Integer, BigInteger, String, ForeignKey, TIMESTAMP, ARRAY, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from typing import TYPE_CHECKING, Optional
@@ -26,3 +26,8 @@ class Report(ModelBase):
     token: Mapped['ReportToken'] = relationship(back_populates="report", cascade="all, delete")
     players: Mapped[list['PlayerReport']] = relationship(back_populates="report", cascade="all, delete-orphan")
     messages: Mapped[list['ReportMessage']] = relationship(back_populates="report", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Used for paginating reports
+        Index('ix_reports_created_at_id', 'created_at', 'id'),
+    )
@@ -0,0 +1,19 @@
+from datetime import datetime
+from typing import Optional
+
+from barricade.db import ModelBase
+
+from sqlalchemy import TIMESTAMP, ForeignKey, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+class ReportOutboxEntry(ModelBase):
+    """A report whose public message has not been sent yet."""
+    __tablename__ = "report_outbox"
+
+    report_id: Mapped[int] = mapped_column(ForeignKey("reports.id", ondelete="CASCADE"), primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP(True), server_default=func.now())
+    next_attempt_at: Mapped[datetime] = mapped_column(TIMESTAMP(True), server_default=func.now(), index=True)
+    attempts: Mapped[int] = mapped_column(default=0, server_default="0")
+    last_error: Mapped[Optional[str]]
+    # Who created the report, for auditing
+    created_by: Mapped[Optional[str]]
@@ -19,8 +19,8 @@ class ReportToken(ModelBase):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     value: Mapped[str] = mapped_column(String, unique=True, index=True, default=lambda: ReportToken.generate_value())
-    community_id: Mapped[int] = mapped_column(ForeignKey("communities.id"))
-    admin_id: Mapped[int] = mapped_column(ForeignKey("admins.discord_id"))
+    community_id: Mapped[int] = mapped_column(ForeignKey("communities.id"), index=True)
+    admin_id: Mapped[int] = mapped_column(ForeignKey("admins.discord_id"), index=True)
     expires_at: Mapped[datetime] = mapped_column(TIMESTAMP(True), server_default=(func.now() + REPORT_TOKEN_EXPIRE_DELTA)) # type: ignore
     platform: Mapped[Platform] = mapped_column(Enum(Platform), default=Platform.PC, server_default=Platform.PC.name)
 
@@ -87,7 +87,10 @@ async def _audit(*embeds: discord.Embed):
     if not DISCORD_AUDIT_CHANNEL_ID:
         return
     channel = bot.get_channel(DISCORD_AUDIT_CHANNEL_ID)
-    if not channel:
+    if not channel and not bot.is_ready():
+        # Not connected to the gateway, so send the message blindly
+        channel = bot.get_partial_messageable(DISCORD_AUDIT_CHANNEL_ID)
+    elif not channel:
         logging.warn("Tried to send to audit but channel with ID %s could not be found", DISCORD_AUDIT_CHANNEL_ID)
         return
     elif not isinstance(channel, discord.TextChannel):
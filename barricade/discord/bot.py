@@ -41,6 +41,7 @@ class Bot(commands.Bot):
         super().__init__(*args, **kwargs)
         self.remove_command('help')
         self.allowed_mentions = discord.AllowedMentions.none()
+        self._fetched_primary_guild: discord.Guild | None = None
     
     async def setup_hook(self) -> None:
         await load_all_cogs()
@@ -66,10 +67,17 @@ class Bot(commands.Bot):
 
     @property
     def primary_guild(self):
-        guild = self.get_guild(DISCORD_GUILD_ID)
+        guild = self.get_guild(DISCORD_GUILD_ID) or self._fetched_primary_guild
         if guild is None:
             raise RuntimeError("Guild not found")
         return guild
+
+    async def fetch_primary_guild(self):
+        """Fetch the primary guild through the API, for processes that do
+        not connect to the gateway and thus have no guild cache. Only its
+        roles are available, members and channels have to be fetched."""
+        self._fetched_primary_guild = await self.fetch_guild(DISCORD_GUILD_ID)
+        return self._fetched_primary_guild
     
     async def get_or_fetch_user(self, user_id: int):
         user = self.get_user(user_id)
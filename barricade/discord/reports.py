@@ -1,12 +1,14 @@
+import asyncio
+from cachetools import TTLCache
 import discord
 from discord.utils import escape_markdown as esc_md
 import logging
+from typing import NamedTuple
 
-from barricade import schemas
-from barricade.constants import DISCORD_CONSOLE_REPORTS_CHANNEL_ID, DISCORD_PC_REPORTS_CHANNEL_ID, T17_SUPPORT_DISCORD_CHANNEL_ID
+from barricade import metrics, schemas
+from barricade.constants import DISCORD_CONSOLE_REPORTS_CHANNEL_ID, DISCORD_PC_REPORTS_CHANNEL_ID, REPORT_EDIT_CONCURRENCY, REPORT_EDIT_DELAY, T17_SUPPORT_DISCORD_CHANNEL_ID
 from barricade.discord.bot import bot
-from barricade.discord.communities import get_admin_name
-from barricade.discord.utils import format_url
+from barricade.discord.utils import MessageEditScheduler, format_url
 from barricade.enums import Emojis, Platform, PlayerAlertType, ReportReasonFlag
 from barricade.utils import get_player_id_type, PlayerIDType
 
@@ -37,45 +39,149 @@ def get_t17_support_forward_channel() -> discord.TextChannel | None:
         channel = None
     return channel
 
+class _PlayerFieldBase(NamedTuple):
+    name: str
+    value: str
+    links: str
+
+class _ReportEmbedBase:
+    """The parts of a report embed that do not depend on who is viewing it."""
+    def __init__(self, report: schemas.ReportWithToken, version: int):
+        self.version = version
+        self.description = esc_md(report.body)
+        self.author_name = "\n".join(
+            ReportReasonFlag(report.reasons_bitflag).to_list(report.reasons_custom, with_emoji=True)
+        )
+        self.author_icon_url = bot.user.avatar.url if bot.user.avatar else None # type: ignore
+        self.players: list[_PlayerFieldBase] = []
+        self._footer: asyncio.Task[tuple[str, str | None]] | None = None
+
+        for player in report.players:
+            player_id_type = get_player_id_type(player.player_id)
+            is_steam = player_id_type == PlayerIDType.STEAM_64_ID
+
+            if report.token.platform == Platform.PC:
+                value = f"{Emojis.STEAM if is_steam else Emojis.EPIC_XBOX} *`{player.player_id}`*"
+            else:
+                value = f"*`{player.player_id}`*"
+
+            links = ""
+            if player_id_type == PlayerIDType.STEAM_64_ID:
+                links += "\n-# " + format_url("View on Steam", f"https://steamcommunity.com/profiles/{player.player_id}")
+
+            bm_rcon_url = player.player.bm_rcon_url
+            if bm_rcon_url:
+                links += "\n-# " + format_url("View on Battlemetrics", bm_rcon_url)
+
+            self.players.append(_PlayerFieldBase(
+                name=esc_md(player.player_name),
+                value=value,
+                links=links,
+            ))
+
+    async def get_footer(self, report: schemas.ReportWithToken) -> tuple[str, str | None]:
+        # Only resolve the admin once, even if requested multiple times at once
+        if self._footer is None or (self._footer.done() and self._footer.exception()):
+            self._footer = asyncio.create_task(self._fetch_footer(report))
+        return await asyncio.shield(self._footer)
+
+    @staticmethod
+    async def _fetch_footer(report: schemas.ReportWithToken) -> tuple[str, str | None]:
+        user = await bot.get_or_fetch_member(report.token.admin_id, strict=False)
+        if user:
+            admin_name = user.nick or user.display_name
+        else:
+            admin_name = report.token.admin.name
+
+        if user and user.avatar:
+            avatar_url = user.avatar.url
+        else:
+            avatar_url = None
+
+        text = f"Report by {admin_name} of {report.token.community.name} • {report.token.community.contact_url}"
+        return text, avatar_url
+
+# Private report messages are edited after a short delay, so that quick
+# successive edits of the same report only result in a single message edit.
+report_message_edits = MessageEditScheduler(
+    "report_message_edits",
+    delay=REPORT_EDIT_DELAY,
+    max_concurrency=REPORT_EDIT_CONCURRENCY,
+)
+
+_report_embed_cache = TTLCache[int, _ReportEmbedBase](maxsize=1000, ttl=60*60)
+_report_embed_cache_hits = metrics.counter(
+    "report_embeds.cache_hits",
+    "Number of report embeds rendered from cache",
+)
+_report_embed_cache_misses = metrics.counter(
+    "report_embeds.cache_misses",
+    "Number of report embeds that had to be rendered from scratch",
+)
+
+def _get_report_version(report: schemas.ReportWithToken) -> int:
+    return hash((
+        report.body,
+        report.reasons_bitflag,
+        report.reasons_custom,
+        report.token.platform,
+        report.token.admin_id,
+        report.token.community.name,
+        report.token.community.contact_url,
+        tuple(
+            (player.player_id, player.player_name, player.player.bm_rcon_url)
+            for player in report.players
+        ),
+    ))
+
+def _get_report_embed_base(report: schemas.ReportWithToken) -> _ReportEmbedBase:
+    version = _get_report_version(report)
+    base = _report_embed_cache.get(report.id)
+    if base and base.version == version:
+        _report_embed_cache_hits.inc()
+    else:
+        _report_embed_cache_misses.inc()
+        base = _ReportEmbedBase(report, version)
+        _report_embed_cache[report.id] = base
+    return base
+
+def invalidate_report_embed(report_id: int):
+    """Discard the cached parts of a report's embed."""
+    _report_embed_cache.pop(report_id, None)
+
 async def get_report_embed(
         report: schemas.ReportWithToken,
         responses: list[schemas.PendingResponse] | None = None,
         stats: dict[int, schemas.ResponseStats] | None = None,
         with_footer: bool = True
 ) -> discord.Embed:
+    base = _get_report_embed_base(report)
+
     embed = discord.Embed(
         colour=discord.Colour.dark_theme(),
-        description=esc_md(report.body),
+        description=base.description,
     )
     embed.set_author(
-        icon_url=bot.user.avatar.url if bot.user.avatar else None, # type: ignore
-        name="\n".join(
-            ReportReasonFlag(report.reasons_bitflag).to_list(report.reasons_custom, with_emoji=True)
-        )
+        icon_url=base.author_icon_url,
+        name=base.author_name,
     )
 
     if responses and len(responses) != len(report.players):
         raise ValueError("Expected %s responses but got %s" % (len(report.players), len(responses)))
 
     response = None
-    for i, player in enumerate(report.players, 1):
-        player_id_type = get_player_id_type(player.player_id)
-        is_steam = player_id_type == PlayerIDType.STEAM_64_ID
-
+    for i, (player, player_base) in enumerate(zip(report.players, base.players), 1):
         if responses:
             response = responses[i - 1] # i starts at 1
         
-        name = f"**`{i}.`** {esc_md(player.player_name)}"
+        name = f"**`{i}.`** {player_base.name}"
         if response:
             if response.banned is True:
-                name = f"**`{i}.`**{Emojis.HIGHLIGHT_RED}{esc_md(player.player_name)}"
+                name = f"**`{i}.`**{Emojis.HIGHLIGHT_RED}{player_base.name}"
             elif response.banned is False:
-                name = f"**`{i}.`**{Emojis.HIGHLIGHT_GREEN}{esc_md(player.player_name)}"
+                name = f"**`{i}.`**{Emojis.HIGHLIGHT_GREEN}{player_base.name}"
 
-        if report.token.platform == Platform.PC:
-            value = f"{Emojis.STEAM if is_steam else Emojis.EPIC_XBOX} *`{player.player_id}`*"
-        else:
-            value = f"*`{player.player_id}`*"
+        value = player_base.value
 
         if stats and (stat := stats.get(player.id)):
             num_responses = stat.num_banned + stat.num_rejected
@@ -106,12 +212,7 @@ async def get_report_embed(
         if response and response.responded_by:
             value += f"\n-# Responded by **{esc_md(response.responded_by)}** {Emojis.BANNED if response.banned else Emojis.UNBANNED}"
 
-        if player_id_type == PlayerIDType.STEAM_64_ID:
-            value += "\n-# " + format_url("View on Steam", f"https://steamcommunity.com/profiles/{player.player_id}")
-
-        bm_rcon_url = player.player.bm_rcon_url
-        if bm_rcon_url:
-            value += "\n-# " + format_url("View on Battlemetrics", bm_rcon_url)
+        value += player_base.links
 
         embed.add_field(
             name=name,
@@ -120,17 +221,10 @@ async def get_report_embed(
         )
 
     if with_footer:
-        user = await bot.get_or_fetch_member(report.token.admin_id, strict=False)
-        if user and user.avatar:
-            avatar_url = user.avatar.url
-        else:
-            avatar_url = None
-
-        admin_name = await get_admin_name(report.token.admin)
-
+        footer_text, avatar_url = await base.get_footer(report)
         embed.timestamp = report.created_at
         embed.set_footer(
-            text=f"Report by {admin_name} of {report.token.community.name} • {report.token.community.contact_url}",
+            text=footer_text,
             icon_url=avatar_url
         )
 
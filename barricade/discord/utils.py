@@ -1,16 +1,18 @@
+import asyncio
 from datetime import datetime, timedelta
 import functools
 import logging
 
-from typing import Callable, Optional, Any, Awaitable
+from typing import Callable, Coroutine, Optional, Any, Awaitable
 
 import discord
 from discord import ui, app_commands, Interaction, ButtonStyle, Emoji, PartialEmoji, SelectOption
 from discord.ext import commands
 from discord.utils import escape_markdown as esc_md, MISSING
 
+from barricade import metrics
 from barricade.constants import DISCORD_GUILD_ID
-from barricade.utils import async_ttl_cache
+from barricade.utils import async_ttl_cache, safe_create_task
 
 class CallableButton(ui.Button):
     def __init__(self,
@@ -197,6 +199,97 @@ class Modal(ui.Modal):
     async def on_error(self, interaction: Interaction, error: Exception, /) -> None:
         await handle_error(interaction, error)
 
+class MessageEditScheduler:
+    """Delays message edits for a short while, so that multiple edits of
+    the same message in quick succession can be combined into one. Only the
+    most recently scheduled edit of each message is performed.
+
+    Edits are performed with a limited concurrency. Edits of the same message
+    never run concurrently.
+    """
+    def __init__(self, name: str, delay: float, max_concurrency: int):
+        self.delay = delay
+        self._pending: dict[tuple[int, int], Callable[[], Coroutine]] = {}
+        self._waiters: dict[tuple[int, int], list[asyncio.Future]] = {}
+        self._tasks: dict[tuple[int, int], asyncio.Task] = {}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._coalesced = metrics.counter(
+            f"{name}.coalesced",
+            "Number of scheduled message edits that were replaced by a newer edit",
+        )
+
+    def schedule(self, channel_id: int, message_id: int, edit: Callable[[], Coroutine]):
+        """Schedule an edit, replacing any pending edit of the same message.
+
+        Parameters
+        ----------
+        channel_id : int
+            The ID of the channel the message is in
+        message_id : int
+            The ID of the message
+        edit : Callable[[], Coroutine]
+            A function returning a coroutine that performs the edit
+        """
+        key = (channel_id, message_id)
+        if key in self._pending:
+            self._coalesced.inc()
+        self._pending[key] = edit
+
+        if key not in self._tasks:
+            self._tasks[key] = safe_create_task(
+                self._run(key),
+                name=f"MessageEdit{channel_id}/{message_id}",
+            )
+
+    async def perform(self, channel_id: int, message_id: int, edit: Callable[[], Coroutine]):
+        """Schedule an edit, and wait until either it or an edit that
+        replaced it has been performed.
+
+        Parameters
+        ----------
+        channel_id : int
+            The ID of the channel the message is in
+        message_id : int
+            The ID of the message
+        edit : Callable[[], Coroutine]
+            A function returning a coroutine that performs the edit
+
+        Raises
+        ------
+        Exception
+            The edit that was performed failed
+        """
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault((channel_id, message_id), []).append(waiter)
+        self.schedule(channel_id, message_id, edit)
+        await waiter
+
+    async def _run(self, key: tuple[int, int]):
+        waiters: list[asyncio.Future] = []
+        try:
+            while key in self._pending:
+                await asyncio.sleep(self.delay)
+                edit = self._pending.pop(key)
+                waiters = self._waiters.pop(key, [])
+                async with self._semaphore:
+                    try:
+                        await edit()
+                    except Exception as e:
+                        logging.exception("Failed to edit message %s/%s", *key)
+                        for waiter in waiters:
+                            if not waiter.done():
+                                waiter.set_exception(e)
+                    else:
+                        for waiter in waiters:
+                            if not waiter.done():
+                                waiter.set_result(None)
+                waiters = []
+        finally:
+            del self._tasks[key]
+            # Do not leave anyone waiting for an edit that will never happen
+            for waiter in waiters + self._waiters.pop(key, []):
+                waiter.cancel()
+
 @async_ttl_cache(size=100, seconds=60*60*24)
 async def get_command_mention(tree: discord.app_commands.CommandTree, name: str, subcommands: str | None = None, guild_only: bool = False):
     if guild_only:
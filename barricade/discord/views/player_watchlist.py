@@ -6,7 +6,7 @@ from discord import ui, ButtonStyle, Interaction
 
 from barricade import schemas
 from barricade.crud.communities import get_community_by_id
-from barricade.crud.watchlists import create_watchlist, get_watchlist_by_player_and_community
+from barricade.crud.watchlists import create_watchlist, delete_watchlist, get_watchlist_by_player_and_community
 from barricade.db import session_factory
 from barricade.discord.communities import assert_has_admin_role
 from barricade.discord.utils import CustomException, View, handle_error_wrap
@@ -108,5 +108,4 @@ class PlayerToggleWatchlistButton(
     async def remove_watchlist(self, db: AsyncSession):
         db_watchlist = await get_watchlist_by_player_and_community(db, self.player_id, self.community_id)
         if db_watchlist:
-            await db.delete(db_watchlist)
-            await db.flush()
\ No newline at end of file
+            await delete_watchlist(db, db_watchlist)
\ No newline at end of file
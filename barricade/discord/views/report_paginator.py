@@ -51,7 +51,14 @@ class ReportPaginator(View):
         try:
             self.page = page
             report = self.reports[page]
-            missing_stats = [pr for pr in report.players if pr.id not in self.stats]
+            # Fetch the stats of all pages at once, so that switching pages
+            # does not require another query
+            missing_stats = [
+                pr
+                for page_report in self.reports
+                for pr in page_report.players
+                if pr.id not in self.stats
+            ]
             
             # Get default view
             if report.token.community_id == self.community.id:
@@ -1,59 +1,55 @@
 import asyncio
+import functools
 import logging
-from typing import Iterable, Sequence
+from statistics import median
+import time
+from typing import Callable, Coroutine, Iterable, Sequence
+import aiohttp
 from cachetools import TTLCache
 import discord
-from sqlalchemy import or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from barricade import schemas
-from barricade.constants import T17_SUPPORT_CUTOFF_DATE, T17_SUPPORT_DISCORD_CHANNEL_ID, T17_SUPPORT_NUM_ALLOWED_REJECTS, T17_SUPPORT_NUM_REQUIRED_RESPONSES, T17_SUPPORT_REASON_MASK
-from barricade.crud.communities import get_community_by_id
-from barricade.crud.reports import get_report_by_id, get_report_message_by_community_id, get_reports_for_player, is_player_reported
-from barricade.crud.responses import bulk_get_response_stats, get_community_responses_to_report, get_pending_responses, get_reports_for_player_with_no_community_review
-from barricade.crud.watchlists import filter_watchlisted_player_ids, is_player_watchlisted
+from barricade import metrics, schemas
+from barricade.constants import FORWARD_REPORT_CONCURRENCY, PLAYER_ALERT_COOLDOWN, T17_SUPPORT_CUTOFF_DATE, T17_SUPPORT_DISCORD_CHANNEL_ID, T17_SUPPORT_NUM_ALLOWED_REJECTS, T17_SUPPORT_NUM_REQUIRED_RESPONSES, T17_SUPPORT_REASON_MASK
+from barricade.crud.reports import get_report_by_id, get_report_message_by_community_id, get_reports_by_ids
+from barricade.crud.responses import bulk_get_pending_responses, bulk_get_response_stats, bulk_get_response_stats_for_reports, classify_players_for_community_alerts, get_community_responses_to_report, get_pending_responses
+from barricade.crud.watchlists import bulk_filter_watchlisted_player_ids, filter_watchlisted_player_ids, is_player_watchlisted
 from barricade.db import models, session_factory
 from barricade.discord import bot
 from barricade.discord.communities import get_alerts_channel, get_alerts_role_mention, get_confirmations_channel, get_forward_channel
-from barricade.discord.reports import get_alert_embed, get_report_channel, get_report_embed, get_t17_support_forward_channel
+from barricade.discord.reports import get_alert_embed, get_report_channel, get_report_embed, get_t17_support_forward_channel, invalidate_report_embed, report_message_edits
 from barricade.discord.utils import View
 from barricade.discord.views.player_watchlist import PlayerToggleWatchlistButton
 from barricade.discord.views.player_review import PlayerReviewView
 from barricade.discord.views.report_management import ReportManagementView
 from barricade.discord.views.t17_support_player_review import T17SupportPlayerReviewView
-from barricade.enums import Platform, PlayerAlertType, ReportMessageType
+from barricade.enums import PlayerAlertType, ReportMessageType
 from barricade.hooks import EventHooks, add_hook
+from barricade.indexes import ForwardingIndex, PlayerIndex
 from barricade.integrations.manager import IntegrationManager
 from barricade.logger import get_logger
 from barricade.urls import URLFactory
 
 @add_hook(EventHooks.report_create)
 async def forward_report_to_communities(report: schemas.ReportWithToken):
-    async with session_factory.begin() as db:
-        stmt = select(models.Community).where(
-            models.Community.forward_guild_id.is_not(None),
-            models.Community.forward_channel_id.is_not(None),
-            models.Community.id != report.token.community_id,
-            or_(
-                models.Community.reasons_filter.is_(None),
-                models.Community.reasons_filter.bitwise_and(report.reasons_bitflag) != 0,
-            )
-        )
-        if report.token.platform == Platform.PC:
-            stmt = stmt.where(models.Community.is_pc.is_(True))
-        elif report.token.platform == Platform.CONSOLE:
-            stmt = stmt.where(models.Community.is_console.is_(True))
+    communities = await ForwardingIndex().get_forward_targets(report)
 
-        result = await db.scalars(stmt)
-        db_communities = result.all()
+    if not communities:
+        return
 
-        if not db_communities:
-            return
+    # Communities with alerts enabled are the most likely to act on the report
+    # right away, so make sure they receive it first.
+    communities.sort(key=lambda community: community.alerts_channel_id is None)
+
+    # Forward to multiple communities at once. Discord's per-route rate limits are
+    # already respected by the client, the semaphore just keeps us from flooding it.
+    semaphore = asyncio.Semaphore(FORWARD_REPORT_CONCURRENCY)
+    started_at = time.monotonic()
+    timings: list[float] = []
 
-        for db_community in db_communities:
+    async def forward(community: schemas.CommunityRef):
+        async with semaphore:
             try:
-                community = schemas.CommunityRef.model_validate(db_community)
-                
                 # Create pending responses
                 responses = [schemas.PendingResponse(
                     pr_id=player.id,
@@ -62,11 +58,23 @@ async def forward_report_to_communities(report: schemas.ReportWithToken):
                     community=community
                 ) for player in report.players]
 
-                await send_or_edit_report_review_message(report, responses, community)
+                message = await send_or_edit_report_review_message(report, responses, community)
+                if message:
+                    timings.append(time.monotonic() - started_at)
 
             except Exception:
-                logger = get_logger(db_community.id)
-                logger.exception("Failed to forward %r to %r", report, db_community)
+                logger = get_logger(community.id)
+                logger.exception("Failed to forward %r to %r", report, community)
+
+    await asyncio.gather(*[forward(community) for community in communities])
+
+    if timings:
+        logging.info(
+            "Forwarded %r to %s/%s communities (first: %.2fs, p50: %.2fs, last: %.2fs)",
+            report, len(timings), len(communities), timings[0], median(timings), timings[-1],
+        )
+    else:
+        logging.warning("Failed to forward %r to any of %s communities", report, len(communities))
 
 @add_hook(EventHooks.report_create)
 async def forward_report_to_token_owner(report: schemas.ReportWithToken):
@@ -86,31 +94,142 @@ async def edit_public_report_message(report: schemas.ReportWithRelations, _):
 async def edit_private_report_messages(report: schemas.ReportWithRelations, _):
     if not report.messages:
         return
-    
-    async with session_factory() as db:
-        for message_data in report.messages:
-            try:
-                # Get new message content
-                if message_data.message_type == ReportMessageType.MANAGE:
-                    await send_or_edit_report_management_message(report)
-                elif message_data.message_type == ReportMessageType.REVIEW:
-                    if not message_data.community_id:
-                        logging.error("Report message has type REVIEW but is missing community id")
-                        continue
 
-                    # Create pending responses
-                    db_community = await get_community_by_id(db, message_data.community_id)
-                    community = schemas.Community.model_validate(db_community)
+    communities: dict[int, schemas.CommunityRef] = {}
+    for message_data in report.messages:
+        if message_data.message_type == ReportMessageType.REVIEW and message_data.community_id:
+            community = await ForwardingIndex().get_community(message_data.community_id)
+            if community:
+                communities[community.id] = community
 
-                    responses = await get_pending_responses(db, community, report.players)
-                    await send_or_edit_report_review_message(report, responses, community)
-                elif message_data.message_type == ReportMessageType.T17_SUPPORT:
-                    await send_or_edit_t17_support_report_review_message(report)
-                else:
-                    raise ValueError("Unknown message type \"%s\"" % message_data.message_type)
-            except Exception:
-                logger = get_logger(message_data.community_id) if message_data.community_id else logging
-                logger.exception("Unexpected error occurred while attempting to edit %r", message_data)
+    render_data = _ReportRenderData(report, communities)
+
+    # Wait for the edits to be performed, so that the delivery of this hook
+    # is only completed once they were, or retried if they failed temporarily
+    edits = []
+    for message_data in report.messages:
+        if message_data.message_type == ReportMessageType.MANAGE:
+            edit = functools.partial(send_or_edit_report_management_message, report)
+
+        elif message_data.message_type == ReportMessageType.REVIEW:
+            if not message_data.community_id:
+                logging.error("Report message has type REVIEW but is missing community id")
+                continue
+
+            community = communities.get(message_data.community_id)
+            if not community:
+                logging.error("Could not find community %s of %r", message_data.community_id, message_data)
+                continue
+
+            edit = functools.partial(_edit_report_review_message, render_data, report, message_data, community)
+
+        elif message_data.message_type == ReportMessageType.T17_SUPPORT:
+            edit = functools.partial(_edit_t17_support_report_review_message, render_data, report)
+
+        else:
+            logging.error("Unknown message type \"%s\" of %r", message_data.message_type, message_data)
+            continue
+
+        edits.append(report_message_edits.perform(
+            message_data.channel_id,
+            message_data.message_id,
+            functools.partial(_edit_private_report_message, edit, message_data),
+        ))
+
+    for result in await asyncio.gather(*edits, return_exceptions=True):
+        if isinstance(result, BaseException):
+            raise result
+
+class _ReportRenderData:
+    """The data needed to render the private messages of a report.
+
+    Edits are delayed by the message edit scheduler, so the data is only
+    loaded once the first edit is performed. That way, edits do not
+    overwrite messages with responses from before the delay. The data is
+    loaded once for all messages, using batched queries.
+    """
+    def __init__(self, report: schemas.ReportWithRelations, communities: dict[int, schemas.CommunityRef]):
+        self.report = report
+        self.communities = communities
+        self._task: asyncio.Task | None = None
+
+    async def get(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._load())
+        # Do not cancel the load of other edits along with our own
+        return await asyncio.shield(self._task)
+
+    async def _load(self):
+        async with session_factory() as db:
+            all_responses = await bulk_get_pending_responses(db, list(self.communities.values()), self.report.players)
+            stats = await bulk_get_response_stats(db, self.report.players)
+            all_watchlisted_player_ids = await bulk_filter_watchlisted_player_ids(
+                db,
+                player_ids={player.player_id for player in self.report.players},
+                community_ids=self.communities.keys(),
+            )
+        return all_responses, stats, all_watchlisted_player_ids
+
+async def _edit_report_review_message(
+    render_data: _ReportRenderData,
+    report: schemas.ReportWithRelations,
+    message_data: schemas.ReportMessageRef,
+    community: schemas.CommunityRef,
+):
+    all_responses, stats, all_watchlisted_player_ids = await render_data.get()
+    await edit_report_review_message(
+        report,
+        message_data,
+        all_responses[community.id],
+        community,
+        stats=stats,
+        watchlisted_player_ids=all_watchlisted_player_ids[community.id],
+    )
+
+async def _edit_t17_support_report_review_message(render_data: _ReportRenderData, report: schemas.ReportWithRelations):
+    _, stats, _ = await render_data.get()
+    await send_or_edit_t17_support_report_review_message(report, stats=stats)
+
+def _is_retryable_error(e: Exception) -> bool:
+    if isinstance(e, discord.HTTPException):
+        return e.status >= 500 or e.status == 429
+    return isinstance(e, (aiohttp.ClientError, asyncio.TimeoutError, OSError))
+
+async def _edit_private_report_message(edit: Callable[[], Coroutine], message_data: schemas.ReportMessageRef):
+    try:
+        await edit()
+    except Exception as e:
+        if _is_retryable_error(e):
+            # Let the delivery be retried
+            raise
+
+        # Retrying will not help, for instance because we lost access to the channel
+        logger = get_logger(message_data.community_id) if message_data.community_id else logging
+        logger.exception("Unexpected error occurred while attempting to edit %r", message_data)
+
+async def edit_report_review_message(
+    report: schemas.ReportWithToken,
+    message_data: schemas.ReportMessageRef,
+    responses: list[schemas.PendingResponse],
+    community: schemas.CommunityRef,
+    stats: dict[int, schemas.ResponseStats],
+    watchlisted_player_ids: set[str],
+):
+    view = PlayerReviewView(
+        responses=responses,
+        watchlisted_player_ids=watchlisted_player_ids,
+    )
+    embed = await PlayerReviewView.get_embed(report, responses, stats=stats)
+    message = bot.get_partial_message(message_data.channel_id, message_data.message_id)
+    try:
+        await message.edit(embed=embed, view=view)
+    except discord.NotFound:
+        # The message no longer exists. Let it be resent.
+        await send_or_edit_report_review_message(
+            report, responses, community,
+            stats=stats,
+            watchlisted_player_ids=watchlisted_player_ids,
+        )
 
 @add_hook(EventHooks.report_delete)
 async def delete_public_report_message(report: schemas.ReportWithRelations):
@@ -196,11 +315,22 @@ async def invoke_integration_report_create_hook(report: schemas.ReportWithToken)
 
 # Report URL Cache
 
-@add_hook(EventHooks.report_create)
+@add_hook(EventHooks.report_create, durable=False)
 async def remove_token_url_from_cache(report: schemas.ReportWithToken):
     URLFactory.remove(report.token)
 
 
+# Report Embed Cache
+
+@add_hook(EventHooks.report_edit, durable=False)
+async def remove_edited_report_embed_from_cache(report: schemas.ReportWithRelations, _):
+    invalidate_report_embed(report.id)
+
+@add_hook(EventHooks.report_delete, durable=False)
+async def remove_deleted_report_embed_from_cache(report: schemas.ReportWithRelations):
+    invalidate_report_embed(report.id)
+
+
 # Player Alerts
 
 class PlayerAlert:
@@ -217,39 +347,55 @@ class PlayerAlert:
         self.alert_type=alert_type
     
     async def send(self, db: AsyncSession, channel: discord.TextChannel):
-        # Locate all the messages, resending as necessary, and updating them with the most
-        # up-to-date details.
-        messages: list[discord.Message] = []
+        if not self.reports:
+            return False
 
-        for report in self.reports:
-            responses = await get_pending_responses(db, self.community, report.players)
-            stats = await bulk_get_response_stats(db, report.players)
-            watchlisted_player_ids = await filter_watchlisted_player_ids(
-                db,
-                player_ids=(player.player_id for player in report.players),
-                community_id=self.community.id,
-            )
+        # Load the responses, stats and watchlists of all reports at once
+        player_reports = [player for report in self.reports for player in report.players]
+        all_responses = await get_pending_responses(db, self.community, player_reports)
+        all_stats = await bulk_get_response_stats_for_reports(db, self.reports)
+        watchlisted_player_ids = await filter_watchlisted_player_ids(
+            db,
+            player_ids=list({player.player_id for player in player_reports}),
+            community_id=self.community.id,
+        )
+
+        responses_by_report: dict[int, list[schemas.PendingResponse]] = {}
+        for response in all_responses:
+            responses_by_report.setdefault(response.player_report.report_id, []).append(response)
+
+        async def locate_message(report: schemas.ReportWithToken):
+            responses = responses_by_report.get(report.id, [])
+            stats = all_stats[report.id]
+            report_watchlisted_player_ids = {
+                player.player_id for player in report.players
+                if player.player_id in watchlisted_player_ids
+            }
 
             message = await send_or_edit_report_review_message(
                 report,
                 responses,
                 self.community,
                 stats=stats,
-                watchlisted_player_ids=watchlisted_player_ids,
+                watchlisted_player_ids=report_watchlisted_player_ids,
             )
             if not message:
                 # Message doesn't exist and couldn't be sent to forward channel either.
                 # Try sending to alerts channel instead.
                 view = PlayerReviewView(
                     responses=responses,
-                    watchlisted_player_ids=watchlisted_player_ids,
+                    watchlisted_player_ids=report_watchlisted_player_ids,
                 )
                 embed = await PlayerReviewView.get_embed(report, responses, stats=stats)
                 message = await channel.send(embed=embed, view=view)
-            
-            if message:
-                # Remember the message
-                messages.append(message)
+            return message
+
+        # Locate all the messages, resending as necessary, and updating them with the most
+        # up-to-date details.
+        results = await asyncio.gather(*[
+            locate_message(report) for report in self.reports
+        ])
+        messages: list[discord.Message] = [message for message in results if message]
 
         if not messages and self.alert_type == PlayerAlertType.UNREVIEWED:
             # No messages were located, so we don't have any reports to point the user at.
@@ -282,7 +428,11 @@ class PlayerAlert:
             case _:
                 raise Exception("Unknown alert type \"%s\"" % self.alert_type)
 
-        reports_urls = list(zip(self.reports, (message.jump_url for message in messages)))
+        reports_urls = [
+            (report, message.jump_url)
+            for report, message in zip(self.reports, results)
+            if message
+        ]
         embed = get_alert_embed(
             reports_urls=list(reversed(reports_urls)),
             player=player,
@@ -295,68 +445,111 @@ class PlayerAlert:
             allowed_mentions=discord.AllowedMentions(roles=True),
             view=view,
         )
+        return True
 
 __community_alerts_enabled = TTLCache[int, bool](maxsize=9999, ttl=60*10)
+# Alerts that were recently sent, used to avoid alerting about the same player
+# multiple times in quick succession.
+__recent_player_alerts = TTLCache[tuple[int, str, PlayerAlertType], bool](maxsize=99999, ttl=PLAYER_ALERT_COOLDOWN)
+__suppressed_player_alerts = metrics.counter(
+    "player_alerts.suppressed",
+    "Number of player alerts not sent because the player was alerted about recently",
+)
 
 async def send_optional_player_alert_to_community(community_id: int, player_ids: Sequence[str]):
     if __community_alerts_enabled.get(community_id) is False:
         return
 
-    alerts: list[PlayerAlert] = []
-    community: schemas.CommunityRef | None = None
+    # Most players are clean, so rule out as many as possible before touching the database
+    player_ids = PlayerIndex().filter_player_ids(community_id, player_ids)
+    if not player_ids:
+        return
 
-    async with session_factory() as db:
-        for player_id in player_ids:
-            is_watchlisted = await is_player_watchlisted(db, player_id, community_id)
-            if is_watchlisted:
-                db_reports = await get_reports_for_player(db, player_id, load_token=True)
-                reports = [
-                    schemas.ReportWithToken.model_validate(db_report)
-                    for db_report in db_reports
-                ]
-
-                if not community:
-                    db_community = await get_community_by_id(db, community_id)
-                    community = schemas.CommunityRef.model_validate(db_community)
-                
-                alert = PlayerAlert(
-                    player_id=player_id,
-                    community=community,
-                    reports=reports,
-                    alert_type=PlayerAlertType.WATCHLISTED,
-                )
-                alerts.append(alert)
-            
-            elif await is_player_reported(db, player_id):
-                if not community:
-                    db_community = await get_community_by_id(db, community_id)
-                    community = schemas.CommunityRef.model_validate(db_community)
-
-                db_reports = await get_reports_for_player_with_no_community_review(
-                    db, player_id, community_id, community.reasons_filter
-                )
-                reports = [
-                    schemas.ReportWithToken.model_validate(db_report)
-                    for db_report in db_reports
-                ]
-
-                alert = PlayerAlert(
-                    player_id=player_id,
-                    community=community,
-                    reports=reports,
-                    alert_type=PlayerAlertType.UNREVIEWED,
-                )
-                alerts.append(alert)
-        
-        if alerts:
-            assert community is not None
-            channel = get_alerts_channel(community)
-            if not channel:
-                # We have nowhere to send the alert, so we just ignore
+    community = await ForwardingIndex().get_community(community_id)
+    if not community:
+        return
+
+    channel = get_alerts_channel(community)
+    __community_alerts_enabled[community_id] = channel is not None
+    if not channel:
+        # We have nowhere to send alerts to, so we just ignore
+        return
+
+    # Reserve the cooldown of every alert we may send before doing anything
+    # else, so that concurrent scans of the same players do not both send it.
+    # Players for whom every alert is cooling down are left out entirely.
+    alert_types = (PlayerAlertType.WATCHLISTED, PlayerAlertType.UNREVIEWED)
+    reserved: set[tuple[int, str, PlayerAlertType]] = set()
+    remaining_player_ids: list[str] = []
+    for player_id in player_ids:
+        keys = [(community_id, player_id, alert_type) for alert_type in alert_types]
+        new_keys = [key for key in keys if key not in __recent_player_alerts]
+        if not new_keys:
+            __suppressed_player_alerts.inc()
+            continue
+
+        for key in new_keys:
+            __recent_player_alerts[key] = True
+        reserved.update(new_keys)
+        remaining_player_ids.append(player_id)
+
+    if not remaining_player_ids:
+        return
+
+    try:
+        async with session_factory() as db:
+            classification = await classify_players_for_community_alerts(
+                db, remaining_player_ids, community_id, community.reasons_filter
+            )
+
+            # Leave out players we have recently sent the same alert for
+            for alert_type, players in (
+                (PlayerAlertType.WATCHLISTED, classification.watchlisted),
+                (PlayerAlertType.UNREVIEWED, classification.unreviewed),
+            ):
+                for player_id in list(players):
+                    if (community_id, player_id, alert_type) not in reserved:
+                        del players[player_id]
+                        __suppressed_player_alerts.inc()
+
+            if not classification.report_ids:
                 return
-            
+
+            db_reports = await get_reports_by_ids(db, classification.report_ids, load_token=True)
+            reports = {
+                db_report.id: schemas.ReportWithToken.model_validate(db_report)
+                for db_report in db_reports
+            }
+
+            alerts: list[PlayerAlert] = []
+            for alert_type, players in (
+                (PlayerAlertType.WATCHLISTED, classification.watchlisted),
+                (PlayerAlertType.UNREVIEWED, classification.unreviewed),
+            ):
+                for player_id, report_ids in players.items():
+                    alert = PlayerAlert(
+                        player_id=player_id,
+                        community=community,
+                        reports=[reports[report_id] for report_id in report_ids if report_id in reports],
+                        alert_type=alert_type,
+                    )
+                    alerts.append(alert)
+
             for alert in alerts:
-                await alert.send(db, channel)
+                try:
+                    sent = await alert.send(db, channel)
+                except Exception:
+                    logger = get_logger(community_id)
+                    logger.exception("Failed to send %s alert for player %s", alert.alert_type.name, alert.player_id)
+                    continue
+
+                # Keep the cooldown only if the alert was actually posted
+                if sent:
+                    reserved.discard((community_id, alert.player_id, alert.alert_type))
+    finally:
+        # Release the cooldowns of alerts that were not sent
+        for key in reserved:
+            __recent_player_alerts.pop(key, None)
 
 # Forward to T17 Support
 
@@ -1,9 +1,28 @@
+import asyncio
 from collections import defaultdict
+from datetime import datetime, timedelta, timezone
 from enum import Enum
-from typing import Callable, Coroutine
+import logging
+import time
+from typing import Any, Callable, Coroutine
 
-from barricade import schemas
-from barricade.utils import safe_create_task
+from pydantic import BaseModel
+from sqlalchemy import delete, event, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, UOWTransaction
+
+from barricade import metrics, schemas
+from barricade.bus import EventBus
+from barricade.constants import (
+    HOOK_CONCURRENCY, HOOK_CONCURRENCY_OVERRIDES, HOOK_LEASE_GRACE_PERIOD,
+    HOOK_MAX_ATTEMPTS, HOOK_MAX_RETRY_DELAY, HOOK_POLL_INTERVAL,
+    HOOK_QUEUE_LIMIT, HOOK_RETRY_DELAY, HOOK_TIMEOUT, HOOK_WORKER_CONCURRENCY
+)
+from barricade.db import models, on_commit, session_factory
+from barricade.utils import Singleton, safe_create_task
+
+def get_hook_name(hook: Callable[..., Coroutine]) -> str:
+    return f"{hook.__module__}.{hook.__qualname__}"
 
 class EventHooks(str, Enum):
     report_create = "report_create"
@@ -13,42 +32,419 @@ class EventHooks(str, Enum):
     player_unban = "player_unban"
 
     __hooks__: dict['EventHooks', list[Callable[..., Coroutine]]] = defaultdict(list)
+    __local_hooks__: set[Callable[..., Coroutine]] = set()
+
+    def _invoke(self, *args: BaseModel, db: AsyncSession | None = None):
+        """Invoke all hooks of this event.
+
+        If a session is provided, the hooks are invoked once its transaction
+        is committed. Durable hooks are then executed by the `HookWorker`,
+        which records them in the same transaction so that they are retried
+        if they fail and are not lost if the process exits. Otherwise, all
+        hooks are executed in the background right away.
+        """
+        if db is None:
+            return self._create_tasks(self.get(), args)
 
-    def _invoke(self, *args):
+        local_hooks = []
+        for hook in self.get():
+            if hook in EventHooks.__local_hooks__:
+                local_hooks.append(hook)
+            else:
+                db.add(models.HookDelivery(
+                    event=self.value,
+                    hook=get_hook_name(hook),
+                    args=[arg.model_dump(mode="json") for arg in args],
+                ))
+
+        if local_hooks:
+            def create_local_tasks():
+                self._create_tasks(local_hooks, args)
+            on_commit(db, create_local_tasks)
+
+    def _create_tasks(self, hooks: list[Callable[..., Coroutine]], args: tuple):
+        executor = HookExecutor()
         return [
-            safe_create_task(
-                coro=hook(*args),
-                err_msg=f"Failed to invoke {self.name} hook {hook.__name__}",
-                name=hook.__name__,
-            ) for hook in self.get()
+            task for task in (executor.submit(self, hook, args) for hook in hooks)
+            if task is not None
         ]
 
     def get(self):
         return EventHooks.__hooks__[self]
-    
-    def register(self, func: Callable[..., Coroutine]):
+
+    def find_hook(self, name: str):
+        """Look up a hook of this event by its name, as returned by
+        `get_hook_name`."""
+        for hook in self.get():
+            if get_hook_name(hook) == name:
+                return hook
+        return None
+
+    def parse_args(self, args: list[Any]) -> tuple[BaseModel, ...]:
+        """Restore the arguments of a hook from their JSON representation."""
+        return tuple(
+            arg_type.model_validate(arg)
+            for arg_type, arg in zip(_HOOK_ARG_TYPES[self], args, strict=True)
+        )
+
+    def register(self, func: Callable[..., Coroutine], durable: bool = True, max_concurrency: int | None = None):
         self.get().append(func)
+        if not durable:
+            EventHooks.__local_hooks__.add(func)
+        if max_concurrency is not None:
+            _hook_concurrency[func] = max_concurrency
         return func
 
     @staticmethod
-    def invoke_report_create(report: schemas.ReportWithToken):
-        return EventHooks.report_create._invoke(report)
+    def invoke_report_create(report: schemas.ReportWithToken, db: AsyncSession | None = None):
+        return EventHooks.report_create._invoke(report, db=db)
 
     @staticmethod
-    def invoke_report_edit(report: schemas.ReportWithRelations, old_report: schemas.ReportWithToken):
-        return EventHooks.report_edit._invoke(report, old_report)
+    def invoke_report_edit(report: schemas.ReportWithRelations, old_report: schemas.ReportWithToken, db: AsyncSession | None = None):
+        return EventHooks.report_edit._invoke(report, old_report, db=db)
 
     @staticmethod
-    def invoke_report_delete(report: schemas.ReportWithRelations):
-        return EventHooks.report_delete._invoke(report)
+    def invoke_report_delete(report: schemas.ReportWithRelations, db: AsyncSession | None = None):
+        return EventHooks.report_delete._invoke(report, db=db)
 
     @staticmethod
-    def invoke_player_ban(response: schemas.ResponseWithToken):
-        return EventHooks.player_ban._invoke(response)
+    def invoke_player_ban(response: schemas.ResponseWithToken, db: AsyncSession | None = None):
+        return EventHooks.player_ban._invoke(response, db=db)
 
     @staticmethod
-    def invoke_player_unban(response: schemas.Response):
-        return EventHooks.player_unban._invoke(response)
+    def invoke_player_unban(response: schemas.Response, db: AsyncSession | None = None):
+        return EventHooks.player_unban._invoke(response, db=db)
+
+_HOOK_ARG_TYPES: dict[EventHooks, tuple[type[BaseModel], ...]] = {
+    EventHooks.report_create: (schemas.ReportWithToken,),
+    EventHooks.report_edit: (schemas.ReportWithRelations, schemas.ReportWithToken),
+    EventHooks.report_delete: (schemas.ReportWithRelations,),
+    EventHooks.player_ban: (schemas.ResponseWithToken,),
+    EventHooks.player_unban: (schemas.Response,),
+}
+
+# Concurrency limits of individual hooks, if different from the default
+_hook_concurrency: dict[Callable[..., Coroutine], int] = {}
+
+def add_hook(hook_type: EventHooks, durable: bool = True, max_concurrency: int | None = None):
+    """Register a hook for an event.
+
+    Parameters
+    ----------
+    hook_type : EventHooks
+        The event to register the hook for
+    durable : bool, optional
+        Whether the hook should be persisted and retried until it succeeds,
+        by default True. Hooks that only affect the state of the current
+        process, such as cache invalidation, should not be durable, since
+        there is no guarantee which process ends up executing them.
+    max_concurrency : int, optional
+        The maximum number of times the hook may be executed simultaneously,
+        by default `HOOK_CONCURRENCY`. Can be overridden through
+        `HOOK_CONCURRENCY_OVERRIDES`.
+    """
+    def decorator(func: Callable[..., Coroutine]):
+        return hook_type.register(func, durable=durable, max_concurrency=max_concurrency)
+    return decorator
+
+
+class _HookState:
+    def __init__(self, hook: Callable[..., Coroutine]):
+        name = get_hook_name(hook)
+        self.max_concurrency = HOOK_CONCURRENCY_OVERRIDES.get(
+            name, _hook_concurrency.get(hook, HOOK_CONCURRENCY)
+        )
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        self.queued = metrics.gauge(
+            f"hooks.{name}.queued",
+            f"Number of executions of {name} waiting for a free slot",
+        )
+        self.running = metrics.gauge(
+            f"hooks.{name}.running",
+            f"Number of executions of {name} in progress",
+        )
+        self.completed = metrics.counter(
+            f"hooks.{name}.completed",
+            f"Number of finished executions of {name}, including failed ones",
+        )
+        self.failed = metrics.counter(
+            f"hooks.{name}.failed",
+            f"Number of failed executions of {name}",
+        )
+        self.rejected = metrics.counter(
+            f"hooks.{name}.rejected",
+            f"Number of executions of {name} that were dropped because too many were queued",
+        )
+        self.duration = metrics.histogram(
+            f"hooks.{name}.duration",
+            f"Time (in seconds) it takes to execute {name}, excluding time spent queued",
+        )
+
+class HookExecutor(Singleton):
+    """Executes hooks while limiting how many executions of each hook may
+    run at the same time. Executions beyond that limit wait for a free slot,
+    unless too many are waiting already, in which case they are dropped.
+    """
+    def __init__(self):
+        self._states: dict[Callable[..., Coroutine], _HookState] = {}
+
+    def _get_state(self, hook: Callable[..., Coroutine]):
+        state = self._states.get(hook)
+        if state is None:
+            state = _HookState(hook)
+            self._states[hook] = state
+        return state
+
+    def is_saturated(self, hook: Callable[..., Coroutine]) -> bool:
+        """Whether all slots of a hook are currently taken."""
+        return self._get_state(hook).semaphore.locked()
+
+    async def execute(self, hook: Callable[..., Coroutine], *args):
+        """Execute a hook once a slot is available.
+
+        Raises
+        ------
+        Exception
+            Any exception raised by the hook
+        """
+        state = self._get_state(hook)
+        state.queued.inc()
+        await self._execute(state, hook, args)
+
+    async def _execute(self, state: _HookState, hook: Callable[..., Coroutine], args: tuple):
+        # Expects the execution to already be counted as queued
+        try:
+            await state.semaphore.acquire()
+        finally:
+            state.queued.dec()
+
+        state.running.inc()
+        start = time.monotonic()
+        try:
+            await hook(*args)
+        except Exception:
+            state.failed.inc()
+            raise
+        finally:
+            state.semaphore.release()
+            state.running.dec()
+            state.completed.inc()
+            state.duration.observe(time.monotonic() - start)
+
+    def submit(self, hook_type: EventHooks, hook: Callable[..., Coroutine], args: tuple) -> asyncio.Task | None:
+        """Execute a hook in the background.
+
+        Returns
+        -------
+        asyncio.Task | None
+            The task executing the hook, or None if the execution was
+            dropped because too many are queued already
+        """
+        state = self._get_state(hook)
+        if state.queued.value >= HOOK_QUEUE_LIMIT:
+            state.rejected.inc()
+            logging.error(
+                "Dropping %s hook %s since %s executions are queued already",
+                hook_type.name, get_hook_name(hook), state.queued.value
+            )
+            return None
+
+        state.queued.inc()
+        return safe_create_task(
+            coro=self._execute(state, hook, args),
+            err_msg=f"Failed to invoke {hook_type.name} hook {get_hook_name(hook)}",
+            name=get_hook_name(hook),
+        )
+
+
+class HookWorker(Singleton):
+    """A pool of workers executing durable hooks.
+
+    Every durable hook of an event is recorded as a delivery in the same
+    transaction as the change that caused the event. Workers claim due
+    deliveries, execute their hook, and remove the delivery once it
+    succeeded. Failed hooks are retried with an exponential backoff until
+    they run out of attempts, after which they remain in the database with
+    no next attempt scheduled.
+
+    While being executed, a delivery is scheduled to be attempted again
+    a grace period after the hook would have timed out. That way, hooks that were being
+    executed when the process exited are picked up again, meaning hooks
+    are executed at least once, but occasionally more than once. Hooks are
+    not guaranteed to be executed in the order their events occurred.
+    """
+    def __init__(self):
+        self._wakeup = asyncio.Event()
+        self._failures = metrics.counter(
+            "hooks.failures",
+            "Number of failed hook executions",
+        )
+
+    def notify(self):
+        """Wake up the workers, for instance because new deliveries were added."""
+        self._wakeup.set()
+
+    async def run(self):
+        """Run the workers until cancelled."""
+        await asyncio.gather(
+            self._monitor(),
+            *(self._work() for _ in range(HOOK_WORKER_CONCURRENCY)),
+        )
+
+    async def _work(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                while await self.process_next():
+                    pass
+            except Exception:
+                logging.exception("Failed to process hook deliveries")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=HOOK_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _monitor(self):
+        """Periodically update the number of pending deliveries of each hook."""
+        while True:
+            try:
+                async with session_factory() as db:
+                    result = await db.execute(
+                        select(models.HookDelivery.hook, func.count())
+                        .where(models.HookDelivery.next_attempt_at.is_not(None))
+                        .group_by(models.HookDelivery.hook)
+                    )
+                    pending = dict(result.tuples().all())
+
+                for hooks in EventHooks.__hooks__.values():
+                    for hook in hooks:
+                        name = get_hook_name(hook)
+                        metrics.gauge(
+                            f"hooks.{name}.pending",
+                            f"Number of executions of {name} stored in the database",
+                        ).set(pending.get(name, 0))
+            except Exception:
+                logging.exception("Failed to count queued hook deliveries")
+
+            await asyncio.sleep(HOOK_POLL_INTERVAL)
+
+    async def process_next(self) -> bool:
+        """Claim and execute the next delivery that is due, if any.
+
+        Returns
+        -------
+        bool
+            Whether a delivery was processed, regardless of whether it
+            succeeded
+        """
+        executor = HookExecutor()
+        # Leave deliveries of hooks without free slots for other workers,
+        # instead of waiting for a slot to become available.
+        saturated = [
+            get_hook_name(hook)
+            for hooks in EventHooks.__hooks__.values()
+            for hook in hooks
+            if executor.is_saturated(hook)
+        ]
+
+        async with session_factory.begin() as db:
+            next_id = select(models.HookDelivery.id) \
+                .where(models.HookDelivery.next_attempt_at <= func.now()) \
+                .order_by(models.HookDelivery.next_attempt_at) \
+                .limit(1) \
+                .with_for_update(skip_locked=True)
+            if saturated:
+                next_id = next_id.where(models.HookDelivery.hook.not_in(saturated))
+            stmt = update(models.HookDelivery) \
+                .where(models.HookDelivery.id == next_id.scalar_subquery()) \
+                .values(
+                    attempts=models.HookDelivery.attempts + 1,
+                    # Retry in case we never get to finish this attempt. The grace period
+                    # keeps other workers from claiming it while we are still timing out.
+                    next_attempt_at=func.now() + timedelta(seconds=HOOK_TIMEOUT + HOOK_LEASE_GRACE_PERIOD),
+                ) \
+                .returning(
+                    models.HookDelivery.id,
+                    models.HookDelivery.event,
+                    models.HookDelivery.hook,
+                    models.HookDelivery.args,
+                    models.HookDelivery.attempts,
+                    models.HookDelivery.created_at,
+                )
+            row = (await db.execute(stmt)).one_or_none()
+
+        if row is None:
+            return False
+
+        hook_type = EventHooks(row.event)
+        hook = hook_type.find_hook(row.hook)
+        if hook is None:
+            logging.warning("Discarding %s delivery of unknown hook %s", row.event, row.hook)
+            await self._complete(row.id)
+            return True
+
+        try:
+            args = hook_type.parse_args(row.args)
+            await asyncio.wait_for(executor.execute(hook, *args), timeout=HOOK_TIMEOUT)
+        except Exception as e:
+            self._failures.inc()
+            await self._fail(row.id, row.hook, row.attempts, e)
+            return True
+        finally:
+            # A slot was freed up, so idle workers may be able to claim
+            # deliveries they had to skip earlier
+            self.notify()
+
+        metrics.histogram(
+            f"hooks.{row.hook}.delay",
+            f"Time (in seconds) between an event occurring and {row.hook} completing",
+        ).observe((datetime.now(tz=timezone.utc) - row.created_at).total_seconds())
+
+        await self._complete(row.id)
+        return True
+
+    async def _complete(self, delivery_id: int):
+        async with session_factory.begin() as db:
+            await db.execute(
+                delete(models.HookDelivery)
+                .where(models.HookDelivery.id == delivery_id)
+            )
+
+    async def _fail(self, delivery_id: int, hook_name: str, attempts: int, error: Exception):
+        if attempts >= HOOK_MAX_ATTEMPTS:
+            next_attempt_at = None
+            logging.error(
+                "Giving up on hook %s after %s attempts",
+                hook_name, attempts, exc_info=error
+            )
+        else:
+            delay = min(HOOK_RETRY_DELAY * 2 ** (attempts - 1), HOOK_MAX_RETRY_DELAY)
+            next_attempt_at = datetime.now(tz=timezone.utc) + timedelta(seconds=delay)
+            logging.warning(
+                "Failed to execute hook %s (attempt %s), retrying in %s seconds",
+                hook_name, attempts, delay, exc_info=error
+            )
+
+        async with session_factory.begin() as db:
+            await db.execute(
+                update(models.HookDelivery)
+                .where(models.HookDelivery.id == delivery_id)
+                .values(
+                    next_attempt_at=next_attempt_at,
+                    last_error=str(error) or type(error).__name__,
+                )
+            )
+
+def _notify_hook_workers():
+    HookWorker().notify()
+    EventBus().publish("hooks")
+
+@event.listens_for(Session, "after_flush")
+def _notify_hook_worker_on_new_delivery(session: Session, flush_context: UOWTransaction):
+    if any(isinstance(instance, models.HookDelivery) for instance in session.new):
+        on_commit(session, _notify_hook_workers)
 
-def add_hook(hook_type: EventHooks):
-    return hook_type.register
+EventBus().subscribe("hooks", lambda _: HookWorker().notify())
+EventBus().subscribe(EventBus.RECONNECT, lambda _: HookWorker().notify())
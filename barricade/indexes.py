@@ -0,0 +1,372 @@
+from array import array
+import asyncio
+from bisect import bisect_left
+from collections import defaultdict
+import logging
+import time
+from typing import Iterable
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, UOWTransaction
+
+from barricade import metrics, schemas
+from barricade.bus import EventBus
+from barricade.constants import PLAYER_INDEX_RELOAD_INTERVAL
+from barricade.db import models, on_commit, session_factory
+from barricade.enums import Platform
+from barricade.hooks import EventHooks, add_hook
+from barricade.utils import Singleton, safe_create_task
+
+class _HashedStringSet:
+    """A memory efficient set of strings.
+
+    Strings are stored as their 64-bit hashes in a sorted array, costing
+    8 bytes per entry. Recently added entries are kept in a regular set until
+    there are enough of them to be worth merging into the array.
+
+    Since only hashes are stored, membership tests may (very rarely) return
+    false positives, but never false negatives. For the same reason, entries
+    cannot be removed, as that would also remove any colliding entries.
+    """
+    MERGE_THRESHOLD = 4096
+
+    def __init__(self, values: Iterable[str] = ()):
+        self._array = array('q', sorted({hash(value) for value in values}))
+        self._pending: set[int] = set()
+
+    def __len__(self):
+        return len(self._array) + len(self._pending)
+
+    def __contains__(self, value: str):
+        h = hash(value)
+        if h in self._pending:
+            return True
+        i = bisect_left(self._array, h)
+        return i < len(self._array) and self._array[i] == h
+
+    def add(self, value: str):
+        if value in self:
+            return
+        self._pending.add(hash(value))
+        if len(self._pending) >= self.MERGE_THRESHOLD:
+            self._merge()
+
+    def _merge(self):
+        self._array = array('q', sorted((*self._array, *self._pending)))
+        self._pending.clear()
+
+class PlayerIndex(Singleton):
+    """An in-memory index of all reported players and all watchlisted players
+    of each community, used to quickly rule out players that cannot possibly
+    trigger an alert without having to query the database.
+
+    Until loaded, all players are assumed to be of interest. Players are
+    never ruled out wrongly, but the index may contain players that no longer
+    need to be. Those are cleaned up whenever the index is reloaded.
+
+    Changes are shared with the indexes of other processes through the
+    event bus. Should a process lose its connection to the bus, its index
+    is reloaded once it reconnects.
+    """
+    def __init__(self):
+        self.loaded = False
+        self._reported = _HashedStringSet()
+        self._watchlisted: defaultdict[int, set[str]] = defaultdict(set)
+        # Changes made while a (re)load is in progress, which would otherwise be lost
+        self._backlog: list[tuple[str, int | None, str]] | None = None
+        # Prevents overlapping (re)loads from interfering with each other's backlog
+        self._load_lock = asyncio.Lock()
+
+        self._hits = metrics.counter(
+            "player_index.hits",
+            "Number of players that may have been reported or watchlisted and had to be looked up"
+        )
+        self._misses = metrics.counter(
+            "player_index.misses",
+            "Number of players that were ruled out without querying the database"
+        )
+        metrics.gauge(
+            "player_index.reported_players",
+            "Number of reported players in the index",
+            getter=lambda: len(self._reported),
+        )
+
+    async def load(self):
+        """(Re)load the index from the database."""
+        async with self._load_lock:
+            await self._load()
+
+    async def _load(self):
+        self._backlog = []
+        try:
+            async with session_factory() as db:
+                result = await db.stream_scalars(
+                    select(models.PlayerReport.player_id).distinct()
+                )
+                reported = _HashedStringSet([player_id async for player_id in result])
+
+                watchlisted: defaultdict[int, set[str]] = defaultdict(set)
+                result = await db.stream(
+                    select(models.PlayerWatchlist.community_id, models.PlayerWatchlist.player_id)
+                )
+                async for community_id, player_id in result:
+                    watchlisted[community_id].add(player_id)
+
+            self._reported = reported
+            self._watchlisted = watchlisted
+
+            # Replay any changes made in the meantime
+            backlog, self._backlog = self._backlog, None
+            for action, community_id, player_id in backlog:
+                self._apply(action, community_id, [player_id])
+
+            self.loaded = True
+            logging.info(
+                "Loaded player index with %s reported players and %s watchlists",
+                len(reported), sum(len(player_ids) for player_ids in watchlisted.values())
+            )
+        finally:
+            self._backlog = None
+
+    async def run(self):
+        """Load the index, and periodically reload it to get rid of stale entries."""
+        while True:
+            try:
+                await self.load()
+            except Exception:
+                logging.exception("Failed to load player index")
+            await asyncio.sleep(PLAYER_INDEX_RELOAD_INTERVAL)
+
+    def add_reported_players(self, player_ids: Iterable[str]):
+        self._publish("report", None, player_ids)
+
+    def add_watchlisted_player(self, community_id: int, player_id: str):
+        self._publish("watchlist", community_id, [player_id])
+
+    def discard_watchlisted_player(self, community_id: int, player_id: str):
+        self._publish("unwatchlist", community_id, [player_id])
+
+    def _publish(self, action: str, community_id: int | None, player_ids: Iterable[str]):
+        player_ids = list(player_ids)
+        if not player_ids:
+            return
+        self._apply(action, community_id, player_ids)
+        EventBus().publish("player_index", {
+            "action": action,
+            "community_id": community_id,
+            "player_ids": player_ids,
+        })
+
+    def _apply(self, action: str, community_id: int | None, player_ids: Iterable[str]):
+        for player_id in player_ids:
+            if action == "report":
+                self._reported.add(player_id)
+            elif action == "watchlist":
+                assert community_id is not None
+                self._watchlisted[community_id].add(player_id)
+            elif action == "unwatchlist":
+                assert community_id is not None
+                self._watchlisted[community_id].discard(player_id)
+            else:
+                raise ValueError("Unknown action %r" % action)
+
+            if self._backlog is not None:
+                self._backlog.append((action, community_id, player_id))
+
+    def _on_reconnect(self):
+        # Changes made while disconnected were missed, so start over. A load
+        # that is already in progress may have missed them as well.
+        if self.loaded or self._load_lock.locked():
+            safe_create_task(self.load(), err_msg="Failed to reload player index")
+
+    def filter_player_ids(self, community_id: int, player_ids: Iterable[str]) -> list[str]:
+        """Filter out all players that are neither reported nor watchlisted
+        by the given community.
+
+        Parameters
+        ----------
+        community_id : int
+            The ID of the community
+        player_ids : Iterable[str]
+            The IDs of the players
+
+        Returns
+        -------
+        list[str]
+            The IDs of players that may be reported or watchlisted
+        """
+        player_ids = list(player_ids)
+        if not self.loaded:
+            return player_ids
+
+        watchlisted = self._watchlisted.get(community_id, set())
+        result = [
+            player_id for player_id in player_ids
+            if player_id in watchlisted or player_id in self._reported
+        ]
+
+        self._hits.inc(len(result))
+        self._misses.inc(len(player_ids) - len(result))
+        return result
+
+
+@add_hook(EventHooks.report_create, durable=False)
+async def add_players_to_index_on_report_create(report: schemas.ReportWithToken):
+    PlayerIndex().add_reported_players(player.player_id for player in report.players)
+
+# Players that are no longer reported are not removed from the index, since
+# that could also remove other players sharing the same hash. They are left
+# for the next reload to clean up instead.
+@add_hook(EventHooks.report_edit, durable=False)
+async def add_players_to_index_on_report_edit(report: schemas.ReportWithRelations, _):
+    PlayerIndex().add_reported_players(player.player_id for player in report.players)
+
+
+def _iter_bits(value: int):
+    while value:
+        bit = value & -value
+        yield bit
+        value ^= bit
+
+class ForwardingIndex(Singleton):
+    """An in-memory index of all communities, used to look up communities
+    and to determine which communities a report should be forwarded to
+    without having to query the database.
+
+    The index is rebuilt whenever a community is changed, or when it has
+    not been rebuilt for a while.
+    """
+    MAX_AGE = 60 * 10
+
+    def __init__(self):
+        self._communities: dict[int, schemas.CommunityRef] = {}
+        # IDs of communities with a forward channel
+        self._forwarding: set[int] = set()
+        # IDs of communities with a forward channel, per platform
+        self._platforms: dict[Platform, set[int]] = {}
+        # IDs of communities without a reasons filter
+        self._unfiltered: set[int] = set()
+        # IDs of communities with a reasons filter, per reason bit included in their filter
+        self._reasons: dict[int, set[int]] = {}
+
+        self._lock = asyncio.Lock()
+        self._generation = 0
+        self._loaded_generation: int | None = None
+        self._loaded_at = 0.0
+
+    def invalidate(self):
+        """Mark the index as outdated, causing it to be rebuilt on next use."""
+        self._generation += 1
+
+    def _is_fresh(self):
+        return (
+            self._loaded_generation == self._generation
+            and time.monotonic() - self._loaded_at < self.MAX_AGE
+        )
+
+    async def _ensure_loaded(self):
+        if self._is_fresh():
+            return
+
+        async with self._lock:
+            if self._is_fresh():
+                return
+
+            generation = self._generation
+            async with session_factory() as db:
+                result = await db.scalars(select(models.Community))
+                communities = {
+                    db_community.id: schemas.CommunityRef.model_validate(db_community)
+                    for db_community in result
+                }
+
+            forwarding: set[int] = set()
+            platforms: dict[Platform, set[int]] = {platform: set() for platform in Platform}
+            unfiltered: set[int] = set()
+            reasons: defaultdict[int, set[int]] = defaultdict(set)
+            for community in communities.values():
+                if not (community.forward_guild_id and community.forward_channel_id):
+                    continue
+
+                forwarding.add(community.id)
+                if community.is_pc:
+                    platforms[Platform.PC].add(community.id)
+                if community.is_console:
+                    platforms[Platform.CONSOLE].add(community.id)
+
+                if community.reasons_filter is None:
+                    unfiltered.add(community.id)
+                else:
+                    for bit in _iter_bits(community.reasons_filter):
+                        reasons[bit].add(community.id)
+
+            self._communities = communities
+            self._forwarding = forwarding
+            self._platforms = platforms
+            self._unfiltered = unfiltered
+            self._reasons = dict(reasons)
+            self._loaded_generation = generation
+            self._loaded_at = time.monotonic()
+
+    async def get_community(self, community_id: int) -> schemas.CommunityRef | None:
+        """Look up a community by its ID.
+
+        Parameters
+        ----------
+        community_id : int
+            The ID of the community
+
+        Returns
+        -------
+        schemas.CommunityRef | None
+            The community, or None if it does not exist
+        """
+        await self._ensure_loaded()
+        return self._communities.get(community_id)
+
+    async def get_forward_targets(self, report: schemas.ReportWithToken) -> list[schemas.CommunityRef]:
+        """Get all communities that a report should be forwarded to. These are
+        all communities with a forward channel, that play on the report's
+        platform and whose reasons filter overlaps with the report's reasons,
+        excluding the community that created the report.
+
+        Parameters
+        ----------
+        report : schemas.ReportWithToken
+            The report
+
+        Returns
+        -------
+        list[schemas.CommunityRef]
+            The communities to forward the report to
+        """
+        await self._ensure_loaded()
+
+        community_ids = set(self._unfiltered)
+        for bit in _iter_bits(report.reasons_bitflag):
+            community_ids |= self._reasons.get(bit, set())
+
+        if report.token.platform in self._platforms:
+            community_ids &= self._platforms[report.token.platform]
+        else:
+            community_ids &= self._forwarding
+
+        community_ids.discard(report.token.community_id)
+        return [self._communities[community_id] for community_id in community_ids]
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_forwarding_index_on_community_change(session: Session, flush_context: UOWTransaction):
+    if any(
+        isinstance(instance, models.Community)
+        for instance in (*session.new, *session.dirty, *session.deleted)
+    ):
+        on_commit(session, _invalidate_forwarding_indexes)
+
+def _invalidate_forwarding_indexes():
+    ForwardingIndex().invalidate()
+    EventBus().publish("forwarding_index")
+
+EventBus().subscribe("player_index", lambda data: PlayerIndex()._apply(**data))
+EventBus().subscribe("forwarding_index", lambda _: ForwardingIndex().invalidate())
+EventBus().subscribe(EventBus.RECONNECT, lambda _: PlayerIndex()._on_reconnect())
+EventBus().subscribe(EventBus.RECONNECT, lambda _: ForwardingIndex().invalidate())
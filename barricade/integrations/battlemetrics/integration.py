@@ -1,13 +1,17 @@
 import asyncio
+from contextvars import ContextVar
 from datetime import datetime, timezone
 import hashlib
 import itertools
-from typing import AsyncGenerator, Sequence, NamedTuple
+import time
+from functools import partial
+from typing import Any, AsyncGenerator, Awaitable, Callable, Generic, Sequence, NamedTuple, TypeVar
 from uuid import uuid4
 import aiohttp
 
-from barricade import schemas
-from barricade.crud.bans import bulk_delete_bans, expire_bans_of_player, get_bans_by_integration
+from barricade import metrics, schemas
+from barricade.constants import BATTLEMETRICS_BULK_CONCURRENCY, BATTLEMETRICS_FULL_SYNC_INTERVAL, BATTLEMETRICS_MAX_RETRIES, BULK_BAN_COMMIT_SIZE
+from barricade.crud.bans import bulk_delete_bans, expire_bans_of_players, get_bans_by_integration, get_bans_by_remote_ids, get_bans_expiring_between
 from barricade.crud.communities import get_community_by_id
 from barricade.db import models, session_factory
 from barricade.discord.communities import safe_send_to_community
@@ -15,9 +19,10 @@ from barricade.discord.reports import get_report_channel
 from barricade.discord.utils import get_danger_embed
 from barricade.enums import Emojis, IntegrationType
 from barricade.exceptions import IntegrationBanError, IntegrationBulkBanError, IntegrationFailureError, IntegrationMissingPermissionsError, NotFoundError, IntegrationValidationError
-from barricade.integrations.battlemetrics.utils import Scope, find_player_id_in_attributes
+from barricade.integrations.battlemetrics.utils import Scope, find_player_id_in_attributes, get_rate_limiter, parse_retry_after
 from barricade.integrations.battlemetrics.websocket import BattlemetricsWebsocket
 from barricade.integrations.integration import Integration, IntegrationMetaData, is_enabled
+from barricade.integrations.manager import IntegrationManager
 from barricade.utils import batched, get_player_id_type, safe_create_task, async_ttl_cache
 
 REQUIRED_SCOPES = {
@@ -35,6 +40,122 @@ OPTIONAL_SCOPES = {
     Scope.from_string("trigger:read"),
 }
 
+T = TypeVar('T')
+
+# Methods of requests that can safely be retried after failing
+IDEMPOTENT_METHODS = {"GET", "PUT", "DELETE"}
+# Statuses of responses to retry requests on
+RETRY_STATUSES = {502, 503, 504}
+# The maximum time (in seconds) to wait before retrying a request, unless told otherwise
+MAX_RETRY_DELAY = 60.0
+
+_throttle_time = metrics.histogram(
+    "integrations.battlemetrics.throttle_time",
+    "Time (in seconds) requests to Battlemetrics waited for the rate limiter",
+)
+_rate_limited = metrics.counter(
+    "integrations.battlemetrics.rate_limited",
+    "Number of requests to Battlemetrics that were rejected for exceeding the rate limit",
+)
+_retries = metrics.counter(
+    "integrations.battlemetrics.retries",
+    "Number of requests to Battlemetrics that were retried",
+)
+
+# The number of requests made by the synchronization running in the current context, if any
+_sync_requests: ContextVar[list[int] | None] = ContextVar("_sync_requests", default=None)
+_sync_duration = {
+    mode: metrics.histogram(
+        f"integrations.battlemetrics.{mode}_sync.duration",
+        f"Time (in seconds) taken by {mode} synchronizations of Battlemetrics ban lists",
+        buckets=(1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 600.0, 1800.0, 3600.0),
+    )
+    for mode in ("full", "delta")
+}
+_sync_request_counts = {
+    mode: metrics.histogram(
+        f"integrations.battlemetrics.{mode}_sync.requests",
+        f"Number of requests made by {mode} synchronizations of Battlemetrics ban lists",
+        buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500),
+    )
+    for mode in ("full", "delta")
+}
+
+class _BulkPipeline(Generic[T]):
+    """Executes remote (un)bans concurrently, and saves their results in
+    chunks so that progress is kept should the process be interrupted.
+
+    The first few jobs are executed before all others. If they all fail,
+    the remaining jobs are not attempted at all.
+    """
+    NUM_PROBES = 5
+
+    def __init__(self, save: Callable[[list[T]], Awaitable[Any]], commit: Callable[[], Awaitable[Any]]):
+        self.save = save
+        self.commit = commit
+        self.failed: list[str] = []
+        self._results: list[T] = []
+        self._lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(BATTLEMETRICS_BULK_CONCURRENCY)
+
+    async def run(self, jobs: Sequence[tuple[str, Callable[[], Awaitable[T | None]]]], abort_message: str):
+        """Execute all jobs.
+
+        Parameters
+        ----------
+        jobs : Sequence[tuple[str, Callable[[], Awaitable[T | None]]]]
+            Pairs of player IDs and jobs. A job returns the result to save,
+            or None if it failed. Jobs should not raise, as that cancels
+            all other jobs.
+        abort_message : str
+            The message of the error raised when all probes fail
+
+        Raises
+        ------
+        IntegrationFailureError
+            All probes failed
+        """
+        try:
+            probes = jobs[:self.NUM_PROBES]
+            await self._execute_all(probes)
+            if len(probes) == self.NUM_PROBES and len(self.failed) == self.NUM_PROBES:
+                raise IntegrationFailureError(abort_message)
+
+            await self._execute_all(jobs[self.NUM_PROBES:])
+        finally:
+            await self._save()
+
+    async def _execute_all(self, jobs: Sequence[tuple[str, Callable[[], Awaitable[T | None]]]]):
+        tasks = [asyncio.create_task(self._execute(player_id, job)) for player_id, job in jobs]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def _execute(self, player_id: str, job: Callable[[], Awaitable[T | None]]):
+        async with self._semaphore:
+            result = await job()
+
+        if result is None:
+            self.failed.append(player_id)
+            return
+
+        self._results.append(result)
+        if len(self._results) >= BULK_BAN_COMMIT_SIZE:
+            await self._save()
+
+    async def _save(self):
+        async with self._lock:
+            if not self._results:
+                return
+            results = self._results
+            self._results = []
+            await self.save(results)
+            await self.commit()
+
 class BattlemetricsPlayerID(NamedTuple):
     player_id: str
     bm_player_id: str
@@ -45,6 +166,8 @@ class BattlemetricsBan(NamedTuple):
     player_id: str | None
     expired: bool
     has_player_linked: bool
+    updated_at: datetime | None = None
+    expires_at: datetime | None = None
 
 class BattlemetricsIntegration(Integration):
     BASE_API_URL = "https://api.battlemetrics.com"
@@ -189,102 +312,206 @@ class BattlemetricsIntegration(Integration):
 
     @is_enabled
     async def bulk_ban_players(self, responses: Sequence[schemas.ResponseWithToken]):
-        ban_ids = []
-        failed = []
         async with session_factory() as db:
-            try:
-                for i, response in enumerate(responses, start=1):
-                    player_id = response.player_report.player_id
-                    report = response.player_report.report
-                    report_channel = get_report_channel(report.token.platform)
-
-                    db_ban = await self.get_ban(db, player_id)
-                    if db_ban is not None:
-                        continue
-
-                    reason = self.get_ban_reason(response)
-                    note = (
-                        f"Banned for {', '.join(report.reasons_bitflag.to_list(report.reasons_custom))}.\n"
-                        f"Reported by {report.token.community.name} ({report.token.community.contact_url})\n"
-                        f"Link to Bunker message: {report_channel.jump_url}/{report.message_id}"
+            db_bans = await self.get_bans(db, [response.player_report.player_id for response in responses])
+
+            # Skip players that are already banned, and only ban each player once
+            to_ban: dict[str, schemas.ResponseWithToken] = {}
+            for response in responses:
+                player_id = response.player_report.player_id
+                if player_id not in db_bans:
+                    to_ban.setdefault(player_id, response)
+
+            async def ban(i: int, player_id: str, response: schemas.ResponseWithToken):
+                report = response.player_report.report
+                report_channel = get_report_channel(report.token.platform)
+
+                reason = self.get_ban_reason(response)
+                note = (
+                    f"Banned for {', '.join(report.reasons_bitflag.to_list(report.reasons_custom))}.\n"
+                    f"Reported by {report.token.community.name} ({report.token.community.contact_url})\n"
+                    f"Link to Bunker message: {report_channel.jump_url}/{report.message_id}"
+                )
+                try:
+                    ban_id = await self.add_ban(
+                        identifier=player_id,
+                        reason=reason,
+                        note=note,
                     )
-                    try:
-                        ban_id = await self.add_ban(
-                            identifier=player_id,
-                            reason=reason,
-                            note=note,
-                        )
-                    except IntegrationFailureError as e:
-                        self.logger.error("Bulk ban %s/%s %s failed: %s", i, len(responses), player_id, e)
-                        failed.append(player_id)
-                        if i == 5 and len(failed) == 5:
-                            raise IntegrationFailureError(
-                                "Failed to bulk ban the first 5 players, stopped prematurely"
-                            )
-                    else:
-                        ban_ids.append((player_id, ban_id))
-
-            finally:
-                await self.set_multiple_ban_ids(db, *ban_ids)
-                await db.commit()
-        
-        if failed:
-            raise IntegrationBulkBanError(failed, "Failed to ban players %s" % ", ".join(failed))
+                except Exception as e:
+                    # Report any failure, rather than cancelling bans that are still in
+                    # progress and possibly already exist remotely
+                    self.logger.error(
+                        "Bulk ban %s/%s %s failed: %s", i, len(to_ban), player_id, e,
+                        exc_info=not isinstance(e, IntegrationFailureError)
+                    )
+                    return None
+                return (player_id, ban_id)
+
+            pipeline = _BulkPipeline[tuple[str, str]](
+                save=lambda ban_ids: self.set_multiple_ban_ids(db, *ban_ids),
+                commit=db.commit,
+            )
+            await pipeline.run(
+                [
+                    (player_id, partial(ban, i, player_id, response))
+                    for i, (player_id, response) in enumerate(to_ban.items(), start=1)
+                ],
+                abort_message="Failed to bulk ban the first 5 players, stopped prematurely",
+            )
+
+        if pipeline.failed:
+            raise IntegrationBulkBanError(pipeline.failed, "Failed to ban players %s" % ", ".join(pipeline.failed))
 
     @is_enabled
     async def bulk_unban_players(self, player_ids: Sequence[str]):
-        failed = []
-        i = 0
         async with session_factory() as db:
-            try:
-                for player_id in player_ids:
-                    db_ban = await self.get_ban(db, player_id)
-                    if not db_ban:
-                        continue
-
-                    i += 1
-                    try:
-                        await self.remove_ban(db_ban.remote_id)
-                    except IntegrationFailureError as e:
-                        self.logger.error("Bulk unban %s/%s %s failed: %s", i, player_id, len(player_ids), e)
-                        failed.append(player_id)
-                        if i == 5 and len(failed) == 5:
-                            raise IntegrationFailureError(
-                                "Failed to bulk unban the first 5 players, stopped prematurely"
-                            )
-                    else:
-                        await db.delete(db_ban)
-                        await db.flush()
-
-            finally:
-                await db.commit()
-        
-        if failed:
-            raise IntegrationBulkBanError(failed, "Failed to unban players %s" % ", ".join(failed))
+            db_bans = await self.get_bans(db, player_ids)
+
+            async def unban(i: int, player_id: str, ban_id: int, remote_id: str):
+                try:
+                    await self.remove_ban(remote_id)
+                except Exception as e:
+                    self.logger.error(
+                        "Bulk unban %s/%s %s failed: %s", i, len(db_bans), player_id, e,
+                        exc_info=not isinstance(e, IntegrationFailureError)
+                    )
+                    return None
+                return ban_id
+
+            pipeline = _BulkPipeline[int](
+                save=lambda ban_ids: bulk_delete_bans(db, models.PlayerBan.id.in_(ban_ids)),
+                commit=db.commit,
+            )
+            await pipeline.run(
+                [
+                    (player_id, partial(unban, i, player_id, db_ban.id, db_ban.remote_id))
+                    for i, (player_id, db_ban) in enumerate(db_bans.items(), start=1)
+                ],
+                abort_message="Failed to bulk unban the first 5 players, stopped prematurely",
+            )
+
+        if pipeline.failed:
+            raise IntegrationBulkBanError(pipeline.failed, "Failed to unban players %s" % ", ".join(pipeline.failed))
     
     @is_enabled
-    async def synchronize(self):
+    async def synchronize(self, full: bool | None = None):
+        """Synchronize the ban list with the bans known locally.
+
+        Parameters
+        ----------
+        full : bool | None, optional
+            Whether to synchronize the entire ban list or only bans that
+            were updated since the last synchronization. By default the
+            entire ban list is synchronized periodically, and whenever
+            only synchronizing updated bans is not possible.
+        """
         if not self.config.id:
             raise RuntimeError("Integration has not yet been saved")
 
-        remote_bans = await self.get_ban_list_bans()
+        async with session_factory() as db:
+            db_config = await db.get(models.Integration, self.config.id)
+            assert db_config is not None
+            synced_until = db_config.bans_synced_until
+            fully_synced_at = db_config.bans_fully_synced_at
+
+        started_at = datetime.now(tz=timezone.utc)
+        if full is None:
+            full = (
+                not synced_until
+                or not fully_synced_at
+                or (started_at - fully_synced_at).total_seconds() >= BATTLEMETRICS_FULL_SYNC_INTERVAL
+            )
+
+        num_requests = [0]
+        token = _sync_requests.set(num_requests)
+        start = time.monotonic()
+        try:
+            remote_bans = None
+            if not full:
+                remote_bans = await self.get_ban_list_bans(updated_since=synced_until)
+                if remote_bans is None:
+                    full = True
+            if remote_bans is None:
+                remote_bans = await self.get_ban_list_bans()
+                assert remote_bans is not None
+
+            await self._reconcile_bans(
+                remote_bans,
+                full=full,
+                expired_between=(synced_until, started_at) if synced_until and not full else None,
+            )
+        finally:
+            _sync_requests.reset(token)
+
+        # Move the high-water mark past all bans that were synchronized
+        timestamps = [ban.updated_at for ban in remote_bans.values() if ban.updated_at]
+        if synced_until:
+            timestamps.append(synced_until)
+
+        async with session_factory.begin() as db:
+            db_config = await db.get(models.Integration, self.config.id)
+            assert db_config is not None
+            db_config.bans_synced_until = max(timestamps, default=None)
+            if full:
+                db_config.bans_fully_synced_at = started_at
+
+        mode = "full" if full else "delta"
+        _sync_duration[mode].observe(time.monotonic() - start)
+        _sync_request_counts[mode].observe(num_requests[0])
+        self.logger.info(
+            "Synchronized %s ban list of %r (%s bans, %s requests)",
+            mode, self, len(remote_bans), num_requests[0]
+        )
+
+    async def _reconcile_bans(
+            self,
+            remote_bans: dict[str, BattlemetricsBan],
+            full: bool,
+            expired_between: tuple[datetime, datetime] | None = None,
+    ):
+        assert self.config.id is not None
+        remote_bans = dict(remote_bans)
         unlinked_bans = [ban for ban in remote_bans.values() if not ban.has_player_linked]
 
         async with session_factory.begin() as db:
             db_community = await get_community_by_id(db, self.config.community_id)
             community = schemas.CommunityRef.model_validate(db_community)
 
-            async for db_ban in get_bans_by_integration(db, self.config.id):
+            if full:
+                db_bans = [db_ban async for db_ban in get_bans_by_integration(db, self.config.id)]
+            else:
+                # Only bans that changed remotely need to be looked at
+                db_bans = await get_bans_by_remote_ids(db, list(remote_bans), self.config.id)
+
+            removed_ban_ids: list[int] = []
+            expired_player_ids: list[str] = []
+            if expired_between:
+                # Bans that expire on their own are not updated remotely, so
+                # rely on the expiry times that were last synchronized instead
+                for db_ban in await get_bans_expiring_between(db, self.config.id, *expired_between):
+                    if db_ban.remote_id not in remote_bans:
+                        expired_player_ids.append(db_ban.player_id)
+
+            for db_ban in db_bans:
                 remote_ban = remote_bans.pop(db_ban.remote_id, None)
                 if not remote_ban:
-                    await db.delete(db_ban)
+                    removed_ban_ids.append(db_ban.id)
+                    continue
 
-                elif remote_ban.expired:
+                if db_ban.expires_at != remote_ban.expires_at:
+                    db_ban.expires_at = remote_ban.expires_at
+
+                if remote_ban.expired:
                     # The player was unbanned, change responses of all reports where
                     # the player is banned
-                    async with session_factory.begin() as _db:
-                        await expire_bans_of_player(_db, db_ban.player_id, db_ban.integration.community_id)
-            
+                    expired_player_ids.append(db_ban.player_id)
+
+            for batch in batched(removed_ban_ids, n=1000):
+                await bulk_delete_bans(db, models.PlayerBan.id.in_(batch))
+            if expired_player_ids:
+                await expire_bans_of_players(db, expired_player_ids, self.config.community_id)
+
             for remote_ban in remote_bans.values():
                 if remote_ban.expired:
                     continue
@@ -318,6 +545,10 @@ class BattlemetricsIntegration(Integration):
         data : dict, optional
             Additional data to include in the request, by default None
 
+        Requests are rate limited per API key. Requests that were rejected
+        for exceeding the rate limit are retried once allowed again. Other
+        temporary failures are only retried for idempotent methods.
+
         Returns
         -------
         dict
@@ -328,44 +559,90 @@ class BattlemetricsIntegration(Integration):
         Exception
             Doom and gloom
         """
+        headers = {"Authorization": f"Bearer {self.config.api_key}"}
+        if method in {"POST", "PATCH"}:
+            kwargs = {"json": data}
+        else:
+            kwargs = {"params": data}
+
+        session = IntegrationManager().http_session
+        limiter = get_rate_limiter(self.config.api_key)
+        attempt = 0
         try:
-            headers = {"Authorization": f"Bearer {self.config.api_key}"}
-            async with aiohttp.ClientSession(headers=headers) as session:
-                if method in {"POST", "PATCH"}:
-                    kwargs = {"json": data}
-                else:
-                    kwargs = {"params": data}
-
-                async with session.request(method=method, url=url, **kwargs) as r: # type: ignore
-                    content_type = r.headers.get('content-type', '')
-                    response: dict | str | None
-                    if "json" in content_type:
-                        response = await r.json()
-                    elif "text/html" in content_type:
-                        response = (await r.content.read()).decode()
-                    elif not content_type:
-                        response = None
-                    else:
-                        raise Exception(f"Unsupported content type: {content_type}")
-                    
-                    if not r.ok:
-                        self.logger.error(
-                            "Failed request %s %s. Data = %s, Response = %s",
-                            method, url, kwargs, response
+            while True:
+                attempt += 1
+                _throttle_time.observe(await limiter.acquire())
+                if (num_requests := _sync_requests.get()) is not None:
+                    num_requests[0] += 1
+
+                try:
+                    async with session.request(
+                        method=method, url=url, headers=headers,
+                        trace_request_ctx=self.meta.type, **kwargs # type: ignore
+                    ) as r:
+                        remaining = r.headers.get("X-Rate-Limit-Remaining", "")
+                        if remaining.isdigit():
+                            limiter.limit(int(remaining))
+
+                        retry_after = parse_retry_after(r.headers.get("Retry-After"))
+                        if r.status == 429:
+                            _rate_limited.inc()
+                            # Hold back all requests made with this key
+                            limiter.pause(retry_after or min(2 ** attempt, MAX_RETRY_DELAY))
+                            delay = 0.0
+                        elif r.status in RETRY_STATUSES and method in IDEMPOTENT_METHODS:
+                            delay = retry_after or min(2 ** attempt, MAX_RETRY_DELAY)
+                        else:
+                            delay = None
+
+                        if delay is None or attempt > BATTLEMETRICS_MAX_RETRIES:
+                            content_type = r.headers.get('content-type', '')
+                            response: dict | str | None
+                            if "json" in content_type:
+                                response = await r.json()
+                            elif "text/html" in content_type:
+                                response = (await r.content.read()).decode()
+                            elif not content_type:
+                                response = None
+                            else:
+                                raise Exception(f"Unsupported content type: {content_type}")
+                            
+                            if not r.ok:
+                                self.logger.error(
+                                    "Failed request %s %s. Data = %s, Response = %s",
+                                    method, url, kwargs, response
+                                )
+                                r.raise_for_status()
+                            return response
+
+                        self.logger.warning(
+                            "Request %s %s failed with status %s, retrying (attempt %s)",
+                            method, url, r.status, attempt
                         )
-                        r.raise_for_status()
 
-        except aiohttp.ClientError as e:
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                    if method not in IDEMPOTENT_METHODS or attempt > BATTLEMETRICS_MAX_RETRIES:
+                        raise
+                    delay = min(2 ** attempt, MAX_RETRY_DELAY)
+                    self.logger.warning(
+                        "Request %s %s failed: %s, retrying (attempt %s)",
+                        method, url, e, attempt
+                    )
+
+                _retries.inc()
+                await asyncio.sleep(delay)
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             if not handle_exc:
                 raise
 
             if isinstance(e, aiohttp.ClientResponseError):
                 raise IntegrationFailureError(e.message) from e
+            elif isinstance(e, asyncio.TimeoutError):
+                raise IntegrationFailureError("Request timed out") from e
             else:
                 raise IntegrationFailureError(str(e)) from e
 
-        return response
-
 
     async def add_ban(self, identifier: str, reason: str, note: str) -> str:
         identifier_type = get_player_id_type(identifier)
@@ -451,29 +728,59 @@ class BattlemetricsIntegration(Integration):
             }
         })
 
-    async def get_ban_list_bans(self) -> dict[str, BattlemetricsBan]:
+    async def get_ban_list_bans(self, updated_since: datetime | None = None) -> dict[str, BattlemetricsBan] | None:
+        """Get all bans on the ban list, including expired ones.
+
+        Parameters
+        ----------
+        updated_since : datetime | None, optional
+            Only get bans updated at or after this time, by default None
+
+        Returns
+        -------
+        dict[str, BattlemetricsBan] | None
+            The bans mapped by their ID, or None if only updated bans
+            were requested but Battlemetrics did not say when bans were
+            last updated
+        """
         data = {
             "filter[banList]": str(self.config.banlist_id),
             "page[size]": 100,
             "filter[expired]": "true"
         }
+        if updated_since:
+            # Get the most recently updated bans first, so that we can stop
+            # as soon as we reach bans that have not changed
+            data["sort"] = "-updatedAt"
 
         url = f"{self.BASE_API_URL}/bans"
         resp: dict = await self._make_request(method="GET", url=url, data=data) # type: ignore
         responses = {}
 
         while True:
+            reached_unchanged = False
             for ban_data in resp["data"]:
                 ban_attrs = ban_data["attributes"]
                 has_player_linked = ban_data["relationships"].get("player") is not None
 
                 ban_id = str(ban_data["id"])
 
+                updated_at_str = ban_attrs.get("updatedAt")
+                updated_at = datetime.fromisoformat(updated_at_str) if updated_at_str else None
+                if updated_since:
+                    if not updated_at:
+                        self.logger.warning("Ban #%s has no update timestamp, unable to only get updated bans", ban_id)
+                        return None
+                    if updated_at < updated_since:
+                        reached_unchanged = True
+                        break
+
                 # Find identifier of valid type
                 player_id, _ = find_player_id_in_attributes(ban_attrs)
 
                 expires_at_str = ban_attrs.get("expires")
                 if not expires_at_str:
+                    expires_at = None
                     expired = False
                 else:
                     expires_at = datetime.fromisoformat(expires_at_str)
@@ -482,17 +789,17 @@ class BattlemetricsIntegration(Integration):
                 # If no valid identifier is found, remove remote ban and skip
                 if not player_id:
                     self.logger.warning("Could not find (valid) identifier for ban #%s %s", ban_id, ban_attrs["identifiers"])
-                    responses[ban_id] = BattlemetricsBan(ban_id, None, expired, True)
+                    responses[ban_id] = BattlemetricsBan(ban_id, None, expired, True, updated_at, expires_at)
                     safe_create_task(
                         self.remove_ban(ban_id),
                         "Failed to remove ban %s with unknown player ID" % ban_id
                     )
                     continue
 
-                responses[ban_id] = BattlemetricsBan(ban_id, player_id, expired, has_player_linked)
+                responses[ban_id] = BattlemetricsBan(ban_id, player_id, expired, has_player_linked, updated_at, expires_at)
 
             link_next = resp["links"].get("next")
-            if link_next:
+            if link_next and not reached_unchanged:
                 resp: dict = await self._make_request(method="GET", url=link_next) # type: ignore
             else:
                 break
@@ -502,15 +809,8 @@ class BattlemetricsIntegration(Integration):
     async def match_player_identifiers(self, player_ids: Sequence[str]) -> AsyncGenerator[BattlemetricsPlayerID, None]:
         url = f"{self.BASE_API_URL}/players/quick-match"
 
-        do_sleep = False
         for grouped_player_ids in batched(player_ids, n=100):
-            # Player Quick Match Identifiers endpoint accepts up to 100 IDs at
-            # once and has a rate limit of ten requests per second.
-            if do_sleep:
-                await asyncio.sleep(0.1)
-            else:
-                do_sleep = True
-
+            # Player Quick Match Identifiers endpoint accepts up to 100 IDs at once
             query_data = []
             for player_id in grouped_player_ids:
                 query_data.append({
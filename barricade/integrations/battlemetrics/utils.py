@@ -1,4 +1,34 @@
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from barricade.constants import BATTLEMETRICS_RATE_LIMIT, BATTLEMETRICS_RATE_LIMIT_BURST
 from barricade.enums import PlayerIDType
+from barricade.utils import TokenBucket
+
+# Rate limiters per API key, since limits apply to keys rather than integrations
+_rate_limiters: dict[str, TokenBucket] = {}
+
+def get_rate_limiter(api_key: str) -> TokenBucket:
+    limiter = _rate_limiters.get(api_key)
+    if limiter is None:
+        limiter = TokenBucket(BATTLEMETRICS_RATE_LIMIT, BATTLEMETRICS_RATE_LIMIT_BURST)
+        _rate_limiters[api_key] = limiter
+    return limiter
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse the value of a Retry-After header, which is either a number
+    of seconds or a date, into a number of seconds."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((retry_at - datetime.now(tz=timezone.utc)).total_seconds(), 0.0)
 
 def find_player_id_in_attributes(attrs: dict) -> tuple[str | None, PlayerIDType]:
     player_id: str | None = None
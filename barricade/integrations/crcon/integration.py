@@ -1,11 +1,15 @@
+import asyncio
+from contextlib import aclosing
 from datetime import datetime, timezone
+import math
 import re
-from typing import TypedDict
+from typing import AsyncGenerator, TypedDict
 
 from aiohttp import ClientResponseError
 
 from barricade import schemas
-from barricade.crud.bans import bulk_delete_bans, expire_bans_of_player, get_bans_by_integration
+from barricade.constants import CRCON_BLACKLIST_CONCURRENCY, CRCON_BLACKLIST_PAGE_SIZE
+from barricade.crud.bans import bulk_delete_bans, expire_bans_of_players, get_bans_by_integration, get_bans_by_remote_ids
 from barricade.crud.communities import get_community_by_id
 from barricade.db import models, session_factory
 from barricade.discord.communities import safe_send_to_community
@@ -14,7 +18,7 @@ from barricade.enums import Emojis, IntegrationType
 from barricade.exceptions import IntegrationMissingPermissionsError, IntegrationValidationError
 from barricade.integrations.custom import CustomIntegration, is_websocket_enabled
 from barricade.integrations.integration import IntegrationMetaData, is_enabled
-from barricade.utils import async_ttl_cache
+from barricade.utils import async_ttl_cache, batched
 
 RE_VERSION = re.compile(r"v(?P<major>\d+).(?P<minor>\d+).(?P<patch>\d+)")
 
@@ -104,25 +108,49 @@ class CRCONIntegration(CustomIntegration):
         if not self.config.id:
             raise RuntimeError("Integration has not yet been saved")
         
-        remote_bans = await self.get_blacklist_bans()
-        async with session_factory.begin() as db:
-            db_community = await get_community_by_id(db, self.config.community_id)
-            community = schemas.CommunityRef.model_validate(db_community)
-            async for db_ban in get_bans_by_integration(db, self.config.id):
-                remote_ban = remote_bans.pop(db_ban.remote_id, None)
-                if not remote_ban:
-                    await db.delete(db_ban)
+        async with session_factory() as db:
+            db_bans = {
+                db_ban.remote_id: (db_ban.id, db_ban.player_id)
+                async for db_ban in get_bans_by_integration(db, self.config.id)
+            }
+
+        # Reconcile records as they arrive, so that the blacklist does not
+        # have to be kept in memory
+        seen_remote_ids: set[str] = set()
+        unrecognized_bans: dict[str, BlacklistRecord] = {}
+        expired_player_ids: list[str] = []
+        async with aclosing(self.iter_blacklist_bans()) as remote_bans:
+            async for remote_ban in remote_bans:
+                remote_id = str(remote_ban["id"])
+                if remote_id in seen_remote_ids:
+                    continue
+                seen_remote_ids.add(remote_id)
+
+                db_ban = db_bans.pop(remote_id, None)
+                if not db_ban:
+                    if remote_ban["is_active"]:
+                        unrecognized_bans[remote_id] = remote_ban
 
                 elif not remote_ban["is_active"]:
                     # The player was unbanned, change responses of all reports where
                     # the player is banned
-                    async with session_factory.begin() as _db:
-                        await expire_bans_of_player(_db, db_ban.player_id, db_ban.integration.community_id)
-            
-            for remote_ban in remote_bans.values():
-                if not remote_ban["is_active"]:
-                    continue
+                    expired_player_ids.append(db_ban[1])
+
+        async with session_factory.begin() as db:
+            db_community = await get_community_by_id(db, self.config.community_id)
+            community = schemas.CommunityRef.model_validate(db_community)
+
+            removed_ban_ids = [ban_id for ban_id, _ in db_bans.values()]
+            for batch in batched(removed_ban_ids, n=1000):
+                await bulk_delete_bans(db, models.PlayerBan.id.in_(batch))
+            if expired_player_ids:
+                await expire_bans_of_players(db, expired_player_ids, self.config.community_id)
 
+            # Bans may have been created while the blacklist was being fetched
+            for db_ban in await get_bans_by_remote_ids(db, list(unrecognized_bans), self.config.id):
+                unrecognized_bans.pop(db_ban.remote_id, None)
+
+            for remote_ban in unrecognized_bans.values():
                 embed = get_danger_embed(
                     "Found unrecognized ban on CRCON blacklist!",
                     (
@@ -212,29 +240,56 @@ class CRCONIntegration(CustomIntegration):
         except Exception as e:
             raise IntegrationValidationError("Failed to recreate blacklist") from e
 
-    async def get_blacklist_bans(self):
-        records: dict[str, BlacklistRecord] = {}
-        page = 1
-        page_size = 100
-        while True:
-            resp = await self._make_request(
-                "GET", "/get_blacklist_records",
-                data=dict(
-                    blacklist_id=self.config.banlist_id,
-                    exclude_expired=1,
-                    page_size=page_size,
-                    page=page,
-                )    
+    async def _get_blacklist_records_page(self, page: int, page_size: int) -> dict:
+        resp = await self._make_request(
+            "GET", "/get_blacklist_records",
+            data=dict(
+                blacklist_id=self.config.banlist_id,
+                exclude_expired=1,
+                page_size=page_size,
+                page=page,
             )
-            result = resp["result"]
+        )
+        return resp["result"]
 
-            for record in result["records"]:
-                records[str(record["id"])] = record
+    async def iter_blacklist_bans(self) -> AsyncGenerator[BlacklistRecord, None]:
+        """Yield all records of the blacklist as their pages arrive.
 
-            if page * page_size >= result["total"]:
-                break
+        The first page is requested on its own to learn the total number
+        of records, after which all remaining pages are requested
+        concurrently. Records are therefore not yielded in order, and may
+        be yielded more than once if the blacklist changes meanwhile.
+        """
+        page_size = CRCON_BLACKLIST_PAGE_SIZE
+        result = await self._get_blacklist_records_page(1, page_size)
+        for record in result["records"]:
+            yield record
 
-            page += 1
+        num_pages = math.ceil(result["total"] / page_size)
+        if num_pages <= 1:
+            return
+
+        semaphore = asyncio.Semaphore(CRCON_BLACKLIST_CONCURRENCY)
+        async def fetch_page(page: int):
+            async with semaphore:
+                return await self._get_blacklist_records_page(page, page_size)
+
+        tasks = [asyncio.create_task(fetch_page(page)) for page in range(2, num_pages + 1)]
+        try:
+            for next_page in asyncio.as_completed(tasks):
+                result = await next_page
+                for record in result["records"]:
+                    yield record
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def get_blacklist_bans(self):
+        records: dict[str, BlacklistRecord] = {}
+        async with aclosing(self.iter_blacklist_bans()) as remote_bans:
+            async for record in remote_bans:
+                records[str(record["id"])] = record
         return records
     
     async def expire_ban(self, record_id: int):
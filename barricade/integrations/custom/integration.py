@@ -1,5 +1,4 @@
 import inspect
-import aiohttp
 from functools import wraps
 from typing import AsyncGenerator, Sequence
 
@@ -16,6 +15,7 @@ from barricade.integrations.custom.models import (
 )
 from barricade.integrations.custom.websocket import CustomWebsocket
 from barricade.integrations.integration import Integration, IntegrationMetaData, is_enabled
+from barricade.integrations.manager import IntegrationManager
 
 def is_websocket_enabled(func):
     @wraps(func)
@@ -219,22 +219,25 @@ class CustomIntegration(Integration):
         """
         url = self.get_api_url() + endpoint
         headers = {"Authorization": f"Bearer {self.config.api_key}"}
-        async with aiohttp.ClientSession(headers=headers) as session:
-            if method in {"POST", "PATCH"}:
-                kwargs = {"json": data}
+        if method in {"POST", "PATCH"}:
+            kwargs = {"json": data}
+        else:
+            kwargs = {"params": data}
+
+        session = IntegrationManager().http_session
+        async with session.request(
+            method=method, url=url, headers=headers,
+            trace_request_ctx=self.meta.type, **kwargs # type: ignore
+        ) as r:
+            r.raise_for_status()
+            content_type = r.headers.get('content-type', '')
+
+            if 'json' in content_type:
+                response = await r.json()
+            # elif "text/html" in content_type:
+            #     response = (await r.content.read()).decode()
             else:
-                kwargs = {"params": data}
-
-            async with session.request(method=method, url=url, **kwargs) as r: # type: ignore
-                r.raise_for_status()
-                content_type = r.headers.get('content-type', '')
-
-                if 'json' in content_type:
-                    response = await r.json()
-                # elif "text/html" in content_type:
-                #     response = (await r.content.read()).decode()
-                else:
-                    raise Exception(f"Unsupported content type: {content_type}")
+                raise Exception(f"Unsupported content type: {content_type}")
 
         return response
 
@@ -7,7 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Sequence
 
 from barricade import schemas
-from barricade.crud.bans import get_ban_by_player_and_integration, create_ban, bulk_create_bans, bulk_delete_bans
+from barricade.crud.bans import get_ban_by_player_and_integration, get_bans_by_players_and_integration, create_ban, bulk_create_bans, bulk_delete_bans
 from barricade.crud.communities import get_community_by_id
 from barricade.crud.integrations import create_integration_config, delete_integration_config, update_integration_config
 from barricade.crud.responses import get_successful_responses_without_bans
@@ -263,6 +263,29 @@ class Integration(ABC):
             integration_id=self.config.id, # type: ignore
         )
 
+    @is_saved
+    async def get_bans(self, db: AsyncSession, player_ids: Sequence[str]) -> dict[str, models.PlayerBan]:
+        """Get the bans of multiple players.
+
+        Parameters
+        ----------
+        db : AsyncSession
+            An asynchronous database session
+        player_ids : Sequence[str]
+            The IDs of the players
+
+        Returns
+        -------
+        dict[str, models.PlayerBan]
+            This integration's bans associated with the players, mapped
+            by player ID. Players without a ban are omitted.
+        """
+        db_bans = await get_bans_by_players_and_integration(db,
+            player_ids=player_ids,
+            integration_id=self.config.id, # type: ignore
+        )
+        return {db_ban.player_id: db_ban for db_ban in db_bans}
+
     @is_saved
     async def set_ban_id(self, db: AsyncSession, player_id: str, ban_id: str) -> models.PlayerBan:
         """Create a ban record
@@ -1,4 +1,15 @@
-from barricade import schemas
+import time
+from types import SimpleNamespace
+
+import aiohttp
+
+from barricade import metrics, schemas
+from barricade.bus import EventBus
+from barricade.constants import (
+    INTEGRATION_HTTP_CONNECT_TIMEOUT, INTEGRATION_HTTP_DNS_CACHE_TTL, INTEGRATION_HTTP_KEEPALIVE_TIMEOUT,
+    INTEGRATION_HTTP_LIMIT, INTEGRATION_HTTP_LIMIT_PER_HOST, INTEGRATION_HTTP_TIMEOUT
+)
+from barricade.enums import IntegrationType
 from barricade.utils import Singleton, safe_create_task
 
 from typing import TYPE_CHECKING, Optional
@@ -7,6 +18,41 @@ if TYPE_CHECKING:
 
 class IntegrationManager(Singleton):
     __integrations: dict[int, 'Integration'] = {}
+    __http_session: aiohttp.ClientSession | None = None
+
+    @property
+    def http_session(self) -> aiohttp.ClientSession:
+        """A long-lived HTTP session shared by all integrations, so that
+        connections to their APIs can be reused between requests.
+
+        Requests should pass the type of the integration making them as
+        `trace_request_ctx`, so that they are reported in its metrics.
+        """
+        session = IntegrationManager.__http_session
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=INTEGRATION_HTTP_LIMIT,
+                limit_per_host=INTEGRATION_HTTP_LIMIT_PER_HOST,
+                keepalive_timeout=INTEGRATION_HTTP_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=INTEGRATION_HTTP_DNS_CACHE_TTL,
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(
+                    total=INTEGRATION_HTTP_TIMEOUT,
+                    connect=INTEGRATION_HTTP_CONNECT_TIMEOUT,
+                ),
+                trace_configs=[_create_trace_config()],
+            )
+            IntegrationManager.__http_session = session
+        return session
+
+    async def close(self):
+        """Close the shared HTTP session, if any."""
+        session = IntegrationManager.__http_session
+        IntegrationManager.__http_session = None
+        if session and not session.closed:
+            await session.close()
 
     def get_by_id(self, integration_id: int) -> Optional['Integration']:
         integration = self.__integrations.get(integration_id)
@@ -48,4 +94,59 @@ class IntegrationManager(Singleton):
             safe_create_task(integration.disable())
         
         integration.logger.info("Removed %r from manager", integration)
-    
\ No newline at end of file
+
+
+def _get_trace_metrics(integration_type: IntegrationType | None):
+    name = integration_type.name.lower() if integration_type else "unknown"
+    return SimpleNamespace(
+        duration=metrics.histogram(
+            f"integrations.{name}.request_duration",
+            f"Time (in seconds) taken by HTTP requests of {name} integrations",
+        ),
+        failures=metrics.counter(
+            f"integrations.{name}.request_failures",
+            f"Number of HTTP requests of {name} integrations that failed without a response",
+        ),
+        new_connections=metrics.counter(
+            f"integrations.{name}.new_connections",
+            f"Number of connections opened for HTTP requests of {name} integrations",
+        ),
+        reused_connections=metrics.counter(
+            f"integrations.{name}.reused_connections",
+            f"Number of HTTP requests of {name} integrations that reused an open connection",
+        ),
+    )
+
+def _create_trace_config():
+    async def on_request_start(session, ctx, params: aiohttp.TraceRequestStartParams):
+        ctx.metrics = _get_trace_metrics(ctx.trace_request_ctx)
+        ctx.start = time.perf_counter()
+
+    async def on_request_end(session, ctx, params: aiohttp.TraceRequestEndParams):
+        ctx.metrics.duration.observe(time.perf_counter() - ctx.start)
+
+    async def on_request_exception(session, ctx, params: aiohttp.TraceRequestExceptionParams):
+        ctx.metrics.duration.observe(time.perf_counter() - ctx.start)
+        ctx.metrics.failures.inc()
+
+    async def on_connection_create_end(session, ctx, params: aiohttp.TraceConnectionCreateEndParams):
+        ctx.metrics.new_connections.inc()
+
+    async def on_connection_reuseconn(session, ctx, params: aiohttp.TraceConnectionReuseconnParams):
+        ctx.metrics.reused_connections.inc()
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+    return trace_config
+
+
+def _disable_integration(integration_id: int):
+    integration = IntegrationManager().get_by_id(integration_id)
+    if integration and integration.config.enabled:
+        safe_create_task(integration.disable(force=True))
+
+EventBus().subscribe("integration_disable", _disable_integration)
@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import os
+import signal
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from barricade.constants import DB_URL, LEADER_ELECTION_INTERVAL
+from barricade.utils import Singleton
+
+class Leadership(Singleton):
+    """Elects a single process to own the Discord bot and the integrations,
+    using a Postgres advisory lock.
+
+    The lock is held by a dedicated connection for as long as the process
+    lives. Should that connection be lost, another process may take over at
+    any moment, so the process is shut down rather than risk running two
+    bots at once.
+    """
+    LOCK_ID = 0x62617272 # "barr"
+
+    def __init__(self):
+        self.is_leader = False
+        self._connection: asyncpg.Connection | None = None
+
+    async def try_acquire(self) -> bool:
+        """Attempt to be elected leader.
+
+        Returns
+        -------
+        bool
+            Whether this process is leader
+        """
+        if self.is_leader:
+            return True
+
+        dsn = make_url(DB_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+        connection = await asyncpg.connect(dsn)
+        try:
+            acquired = await connection.fetchval("SELECT pg_try_advisory_lock($1)", self.LOCK_ID)
+        except Exception:
+            await connection.close()
+            raise
+
+        if not acquired:
+            await connection.close()
+            return False
+
+        connection.add_termination_listener(self._on_connection_lost)
+        self._connection = connection
+        self.is_leader = True
+        logging.info("Elected as leader")
+        return True
+
+    async def acquire(self):
+        """Wait until this process is elected leader."""
+        logged = False
+        while True:
+            try:
+                if await self.try_acquire():
+                    return
+            except Exception:
+                logging.exception("Failed to attempt leader election")
+
+            if not logged:
+                logging.info("Another process is leader, standing by...")
+                logged = True
+            await asyncio.sleep(LEADER_ELECTION_INTERVAL)
+
+    async def release(self):
+        """Step down as leader, if this process is one."""
+        connection, self._connection = self._connection, None
+        self.is_leader = False
+        if connection and not connection.is_closed():
+            connection.remove_termination_listener(self._on_connection_lost)
+            # Closing the connection also releases the lock
+            await connection.close()
+
+    def _on_connection_lost(self, connection: asyncpg.Connection):
+        if self._connection is not connection:
+            return
+        logging.critical("Lost connection holding the leader lock, shutting down")
+        self.is_leader = False
+        os.kill(os.getpid(), signal.SIGTERM)
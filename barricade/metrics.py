@@ -0,0 +1,115 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+import time
+from typing import Callable, TypeVar
+
+class Counter:
+    """A value that only ever goes up."""
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+    def collect(self):
+        return self.value
+
+class Gauge:
+    """A value that can go up and down. If a getter is provided, the
+    value is obtained from it each time it is collected."""
+    def __init__(self, name: str, description: str, getter: Callable[[], float] | None = None):
+        self.name = name
+        self.description = description
+        self.getter = getter
+        self.value: float = 0
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def collect(self):
+        if self.getter:
+            return self.getter()
+        return self.value
+
+class Histogram:
+    """A distribution of observed values, such as durations in seconds."""
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self, name: str, description: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.bucket_counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    @contextmanager
+    def time(self):
+        """Observe the time it takes for the context to exit."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - start)
+
+    def collect(self):
+        cumulative = 0
+        buckets: dict[str, int] = {}
+        for bound, amount in zip((*self.buckets, float("inf")), self.bucket_counts):
+            cumulative += amount
+            buckets[str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": buckets,
+        }
+
+Metric = Counter | Gauge | Histogram
+MetricT = TypeVar("MetricT", Counter, Gauge, Histogram)
+
+__metrics__: dict[str, Metric] = {}
+
+def _get_or_create(cls: type[MetricT], name: str, *args, **kwargs) -> MetricT:
+    metric = __metrics__.get(name)
+    if metric is None:
+        metric = cls(name, *args, **kwargs)
+        __metrics__[name] = metric
+    elif not isinstance(metric, cls):
+        raise TypeError("Metric %s is a %s, not a %s" % (name, type(metric).__name__, cls.__name__))
+    return metric
+
+def counter(name: str, description: str = "") -> Counter:
+    """Get or create a counter."""
+    return _get_or_create(Counter, name, description)
+
+def gauge(name: str, description: str = "", getter: Callable[[], float] | None = None) -> Gauge:
+    """Get or create a gauge."""
+    return _get_or_create(Gauge, name, description, getter)
+
+def histogram(name: str, description: str = "", buckets: tuple[float, ...] = Histogram.DEFAULT_BUCKETS) -> Histogram:
+    """Get or create a histogram."""
+    return _get_or_create(Histogram, name, description, buckets)
+
+def collect_all():
+    """Take a snapshot of the current value of all metrics."""
+    return {
+        name: {
+            "type": type(metric).__name__.lower(),
+            "description": metric.description,
+            "value": metric.collect(),
+        }
+        for name, metric in sorted(__metrics__.items())
+    }
@@ -0,0 +1,217 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import logging
+
+import discord
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, UOWTransaction
+
+from barricade import metrics, schemas
+from barricade.bus import EventBus
+from barricade.constants import (
+    REPORT_OUTBOX_CONCURRENCY, REPORT_OUTBOX_MAX_RETRY_DELAY, REPORT_OUTBOX_POLL_INTERVAL,
+    REPORT_OUTBOX_RETRY_DELAY, REPORT_OUTBOX_SEND_TIMEOUT
+)
+from barricade.crud.reports import get_report_by_id
+from barricade.db import models, on_commit, session_factory
+from barricade.discord import bot
+from barricade.discord.audit import audit_report_create
+from barricade.discord.reports import get_report_channel, get_report_embed
+from barricade.hooks import EventHooks
+from barricade.utils import Singleton, safe_create_task
+
+class ReportOutbox(Singleton):
+    """Dispatcher responsible for sending the public messages of newly
+    created reports.
+
+    Reports are committed together with an outbox entry, without waiting
+    for Discord. The dispatcher then sends the message, stores its ID on
+    the report, and removes the entry while recording the report_create
+    hooks in the same transaction. Failed attempts are retried with an
+    exponential backoff.
+
+    Entries are claimed by pushing back their next attempt for as long as
+    sending may take, so that multiple dispatchers can send messages at
+    once without sending the same message twice, and without holding any
+    locks while waiting for Discord. Should a dispatcher fail after
+    sending a message but before storing its ID, the next attempt first
+    looks for the message in the channel's recent history instead of
+    sending it again.
+    """
+    HISTORY_LIMIT = 100
+
+    def __init__(self):
+        self._wakeup = asyncio.Event()
+
+        self._delay = metrics.histogram(
+            "report_outbox.delay",
+            "Time (in seconds) between a report being created and its public message being sent",
+        )
+        self._failures = metrics.counter(
+            "report_outbox.failures",
+            "Number of failed attempts at sending a report's public message",
+        )
+        self._recovered = metrics.counter(
+            "report_outbox.recovered",
+            "Number of public messages found to have been sent by an earlier, interrupted attempt",
+        )
+
+    def notify(self):
+        """Wake up the dispatcher, for instance because a new entry was added."""
+        self._wakeup.set()
+
+    async def run(self):
+        """Keep dispatching entries until cancelled."""
+        await asyncio.gather(*(self._work() for _ in range(REPORT_OUTBOX_CONCURRENCY)))
+
+    async def _work(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                while await self.dispatch_next():
+                    pass
+            except Exception:
+                logging.exception("Failed to dispatch report outbox")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=REPORT_OUTBOX_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def dispatch_next(self) -> bool:
+        """Dispatch the next entry that is due, if any.
+
+        Returns
+        -------
+        bool
+            Whether an entry was processed, regardless of whether it
+            succeeded
+        """
+        async with session_factory() as db:
+            stmt = select(models.ReportOutboxEntry) \
+                .where(models.ReportOutboxEntry.next_attempt_at <= datetime.now(tz=timezone.utc)) \
+                .order_by(models.ReportOutboxEntry.next_attempt_at) \
+                .limit(1) \
+                .with_for_update(skip_locked=True)
+            db_entry = await db.scalar(stmt)
+            if not db_entry:
+                return False
+
+            db_report = await get_report_by_id(db, db_entry.report_id, load_token=True)
+            if not db_report:
+                # Report was deleted in the meantime
+                await db.delete(db_entry)
+                await db.commit()
+                return True
+
+            report = schemas.ReportWithToken.model_validate(db_report)
+            entry_created_at = db_entry.created_at
+            # Any earlier attempt may have sent the message before failing
+            may_have_been_sent = db_entry.attempts > 0
+
+            # Claim the entry for as long as sending may take. Should we never
+            # get to finish this attempt, it is picked up again afterwards.
+            db_entry.attempts += 1
+            db_entry.next_attempt_at = datetime.now(tz=timezone.utc) + timedelta(seconds=REPORT_OUTBOX_SEND_TIMEOUT * 2)
+            await db.commit()
+
+        message_id = report.message_id
+        try:
+            if not message_id:
+                message_id = await asyncio.wait_for(
+                    self._send(report, entry_created_at, may_have_been_sent),
+                    timeout=REPORT_OUTBOX_SEND_TIMEOUT,
+                )
+        except Exception as e:
+            self._failures.inc()
+            await self._fail(report.id, e)
+            return True
+
+        async with session_factory() as db:
+            db_entry = await db.get(models.ReportOutboxEntry, report.id, with_for_update=True)
+            db_report = await get_report_by_id(db, report.id, load_token=True)
+            if not db_entry or not db_report:
+                # Report was deleted in the meantime
+                return True
+
+            db_report.message_id = message_id
+            created_by = db_entry.created_by
+            self._delay.observe((datetime.now(tz=timezone.utc) - db_entry.created_at).total_seconds())
+
+            report = schemas.ReportWithToken.model_validate(db_report)
+            EventHooks.invoke_report_create(report, db=db)
+            await db.delete(db_entry)
+            await db.commit()
+
+        safe_create_task(
+            audit_report_create(report, by=created_by)
+        )
+        return True
+
+    async def _send(self, report: schemas.ReportWithToken, created_at: datetime, may_have_been_sent: bool) -> int:
+        embed = await get_report_embed(report)
+        channel = get_report_channel(report.token.platform)
+
+        if may_have_been_sent:
+            message = await self._find_sent_message(channel, embed, created_at)
+            if message:
+                self._recovered.inc()
+                return message.id
+
+        message = await channel.send(embed=embed, nonce=f"report-{report.id}")
+        return message.id
+
+    async def _find_sent_message(self, channel: discord.TextChannel, embed: discord.Embed, created_at: datetime):
+        """Look for a message with the given embed that we sent after the
+        report was created. Discord does not return nonces of past messages,
+        so messages are matched by their content instead."""
+        assert bot.user is not None
+        async for message in channel.history(limit=self.HISTORY_LIMIT, after=created_at):
+            if message.author.id != bot.user.id:
+                continue
+            if any(
+                sent_embed.description == embed.description
+                and _same_timestamp(sent_embed.timestamp, embed.timestamp)
+                for sent_embed in message.embeds
+            ):
+                return message
+        return None
+
+    async def _fail(self, report_id: int, error: Exception):
+        async with session_factory() as db:
+            db_entry = await db.get(models.ReportOutboxEntry, report_id, with_for_update=True)
+            if not db_entry:
+                return
+
+            db_entry.last_error = str(error) or type(error).__name__
+            delay = min(
+                REPORT_OUTBOX_RETRY_DELAY * 2 ** (db_entry.attempts - 1),
+                REPORT_OUTBOX_MAX_RETRY_DELAY
+            )
+            db_entry.next_attempt_at = datetime.now(tz=timezone.utc) + timedelta(seconds=delay)
+            attempts = db_entry.attempts
+            await db.commit()
+
+        logging.error(
+            "Failed to send public message of report %s (attempt %s), retrying in %s seconds",
+            report_id, attempts, delay, exc_info=error
+        )
+
+
+def _same_timestamp(a: datetime | None, b: datetime | None):
+    # Discord stores timestamps with millisecond precision
+    if a is None or b is None:
+        return a is b
+    return abs(a - b) < timedelta(milliseconds=1)
+
+def _notify_report_outboxes():
+    ReportOutbox().notify()
+    EventBus().publish("report_outbox")
+
+@event.listens_for(Session, "after_flush")
+def _notify_report_outbox_on_new_entry(session: Session, flush_context: UOWTransaction):
+    if any(isinstance(instance, models.ReportOutboxEntry) for instance in session.new):
+        on_commit(session, _notify_report_outboxes)
+
+EventBus().subscribe("report_outbox", lambda _: ReportOutbox().notify())
+EventBus().subscribe(EventBus.RECONNECT, lambda _: ReportOutbox().notify())
@@ -401,3 +401,16 @@ class ResponseStats(BaseModel):
     num_banned: int
     num_rejected: int
     reject_reasons: dict[ReportRejectReason, int]
+
+class PlayerAlertClassification(BaseModel):
+    # Mappings of player IDs to the IDs of the reports to include in their alert
+    watchlisted: dict[str, list[int]] = Field(default_factory=dict)
+    unreviewed: dict[str, list[int]] = Field(default_factory=dict)
+
+    @property
+    def report_ids(self) -> set[int]:
+        return {
+            report_id
+            for report_ids in (*self.watchlisted.values(), *self.unreviewed.values())
+            for report_id in report_ids
+        }
@@ -0,0 +1,74 @@
+from contextlib import asynccontextmanager
+import logging
+
+from barricade import integrations
+from barricade.bus import EventBus
+from barricade.discord import bot
+from barricade.hooks import HookWorker
+from barricade.indexes import PlayerIndex
+from barricade.leader import Leadership
+from barricade.outbox import ReportOutbox
+from barricade.constants import DISCORD_BOT_TOKEN, PROCESS_ROLE
+from barricade.utils import safe_create_task
+
+async def run_leader():
+    """Wait until this process is elected leader, and then start the
+    Discord bot, the integrations and all background workers."""
+    await Leadership().acquire()
+
+    # Load all integrations into the manager
+    await integrations.load_all()
+
+    # Start building the player index in the background
+    safe_create_task(PlayerIndex().run(), name="PlayerIndex")
+
+    # Start the Discord bot
+    safe_create_task(bot.connect(reconnect=True), name="DiscordBot")
+    await bot.wait_until_ready()
+
+    assert bot.user is not None
+    logging.info("Started bot %s (ID: %s)", bot.user.name, bot.user.id)
+
+    # Start executing hooks, including those left over from before a restart
+    safe_create_task(HookWorker().run(), name="HookWorker")
+
+    # Start sending the public messages of new reports
+    safe_create_task(ReportOutbox().run(), name="ReportOutbox")
+
+@asynccontextmanager
+async def run_services():
+    """Start everything this process needs according to its role, and
+    shut it all down again on exit. Database tables are expected to
+    exist already."""
+    # Start exchanging events with other processes
+    safe_create_task(EventBus().run(), name="EventBus")
+
+    leader_task = None
+    try:
+        # Log in to Discord, so that its API can be used
+        await bot.login(DISCORD_BOT_TOKEN)
+
+        if PROCESS_ROLE == "bot" or (PROCESS_ROLE == "all" and await Leadership().try_acquire()):
+            await run_leader()
+        else:
+            # Without a gateway connection, members and channels are fetched through the API instead
+            await bot.fetch_primary_guild()
+
+            if PROCESS_ROLE == "all":
+                # Stand by to take over should the leader go down
+                leader_task = safe_create_task(run_leader(), name="Leader")
+
+        yield
+
+    finally:
+        if leader_task and not leader_task.done():
+            leader_task.cancel()
+
+        # Close bot if necessary
+        if not bot.is_closed():
+            await bot.close()
+
+        # Close connections to the APIs of integrations
+        await integrations.IntegrationManager().close()
+
+        await Leadership().release()
@@ -5,6 +5,7 @@ from typing import ClassVar, NamedTuple
 from urllib.parse import urlencode
 
 from barricade import schemas
+from barricade.bus import EventBus
 from barricade.constants import REPORT_FORM_URL
 from barricade.crud.reports import create_token
 from barricade.enums import Platform, ReportReasonFlag
@@ -150,4 +151,14 @@ class URLFactory:
     @staticmethod
     def remove(token: schemas._ReportTokenBase) -> bool:
         key = URLFactory.Key.from_token(token)
+        # URLs may also be cached by other processes
+        EventBus().publish("report_url", [key.admin_id, key.community_id, key.platform.name])
         return URLFactory._cache.pop(key, None) is not None
+
+    @staticmethod
+    def _on_remove(data: list):
+        admin_id, community_id, platform = data
+        URLFactory._cache.pop(URLFactory.Key(admin_id, community_id, Platform[platform]), None)
+
+EventBus().subscribe("report_url", URLFactory._on_remove)
+EventBus().subscribe(EventBus.RECONNECT, lambda _: URLFactory._cache.clear())
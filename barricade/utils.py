@@ -5,6 +5,7 @@ from cachetools.keys import hashkey
 from functools import wraps
 import logging
 import re
+import time
 
 from barricade.enums import PlayerIDType
 
@@ -71,3 +72,61 @@ def batched(iterable: Sequence[T], n=1) -> Iterable[Iterable[T]]:
     l = len(iterable)
     for ndx in range(0, l, n):
         yield iterable[ndx:min(ndx + n, l)]
+
+class TokenBucket:
+    """A rate limiter allowing `rate` acquisitions per second on average,
+    and bursts of up to `capacity` acquisitions at once.
+
+    Waiters are served in the order they arrive.
+    """
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated_at = now
+
+    async def acquire(self) -> float:
+        """Wait until a token is available and take it.
+
+        Returns
+        -------
+        float
+            The time (in seconds) spent waiting
+        """
+        start = time.monotonic()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return time.monotonic() - start
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Hand out no tokens for the given amount of time, after which
+        the bucket starts refilling from empty."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0
+        self._updated_at = max(self._updated_at, self._paused_until)
+
+    def limit(self, remaining: int):
+        """Make sure no more than the given number of tokens are left,
+        for instance when a server reports fewer remaining requests than
+        expected."""
+        self._refill()
+        self._tokens = min(self._tokens, max(remaining, 0))
@@ -1,39 +1,16 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-import logging
 
-from barricade import integrations
-from barricade.db import create_tables
-from barricade.discord import bot
-from barricade.constants import DISCORD_BOT_TOKEN, WEB_DOCS_VISIBLE
-from barricade.utils import safe_create_task
+from barricade.constants import PROCESS_ROLE, WEB_DOCS_VISIBLE
+from barricade.services import run_services
 from barricade.web import routers
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Create all database tables
-    await create_tables()
-
-    # Load all integrations into the manager
-    await integrations.load_all()
-
-    try:
-        # Start the Discord bot
-        await bot.login(DISCORD_BOT_TOKEN)
-        safe_create_task(bot.connect(reconnect=True), name="DiscordBot")
-        await bot.wait_until_ready()
-        
-        assert bot.user is not None
-        logging.info("Started bot %s (ID: %s)", bot.user.name, bot.user.id)
-    
+    async with run_services():
         # Start serving requests
         yield
 
-    finally:
-        # Close bot if necessary
-        if not bot.is_closed():
-            await bot.close()
-
 if WEB_DOCS_VISIBLE:
     app = FastAPI(lifespan=lifespan)
 else:
@@ -41,4 +18,5 @@ else:
     app = FastAPI(lifespan=lifespan, docs_url=None, redoc_url=None)
 
 # Add routers
-routers.setup_all(app)
+if PROCESS_ROLE != "bot":
+    routers.setup_all(app)
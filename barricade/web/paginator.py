@@ -1,6 +1,10 @@
-from fastapi import Request, Query, Depends
+import base64
+import binascii
+from datetime import datetime
+from fastapi import HTTPException, Request, Query, Depends, status
+import json
 from pydantic import BaseModel, AnyHttpUrl
-from typing import Annotated, Generic, Sequence, TypeVar, Optional
+from typing import Annotated, Any, Callable, Generic, Sequence, TypeVar, Optional
 
 class PaginatedResponseLinks(BaseModel):
     prev: Optional[AnyHttpUrl] = None
@@ -12,18 +16,85 @@ class PaginatedResponse(BaseModel, Generic[M]):
     items: list[M]
     links: PaginatedResponseLinks
 
+def _encode_cursor(values: Sequence[Any]) -> str:
+    data = json.dumps([
+        value.isoformat() if isinstance(value, datetime) else value
+        for value in values
+    ], separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str, types: Sequence[type]) -> tuple:
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(data)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError
+        return tuple(
+            datetime.fromisoformat(value) if type_ is datetime else type_(value)
+            for type_, value in zip(types, values)
+        )
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
 class PaginatorParams:
+    """Parameters for paginating a list of items.
+
+    By default items are paginated using an offset. When a cursor is
+    provided (an empty cursor refers to the first page), the items are
+    paginated by their sort key instead, which remains fast regardless
+    of how deep into the results the page is. The ``next`` link will then
+    contain the cursor of the following page.
+    """
     def __init__(self,
             req: Request,
             limit: Annotated[int, Query(gt=0, le=1000)] = 100,
             offset: Annotated[int, Query(ge=0)] = 0,
+            cursor: Annotated[Optional[str], Query(max_length=1000)] = None,
     ):
         self.req = req
         self.offset = offset
         self.limit = limit
+        self.cursor = cursor
+
+        if self.cursor is not None and self.offset:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cannot use both an offset and a cursor"
+            )
+
+    @property
+    def use_cursor(self):
+        return self.cursor is not None
+
+    def get_cursor(self, *types: type) -> tuple | None:
+        """Decode the cursor into the sort key of the last item of the
+        previous page, or None if at the first page.
+
+        Parameters
+        ----------
+        *types : type
+            The types of the values making up the sort key
+
+        Returns
+        -------
+        tuple | None
+            The sort key
+
+        Raises
+        ------
+        HTTPException
+            The cursor is invalid
+        """
+        if not self.cursor:
+            return None
+        return _decode_cursor(self.cursor, types)
 
     def _get_prev_url(self, items: Sequence[M]):
-        if self.offset == 0:
+        # Cursors only point forwards
+        if self.use_cursor or self.offset == 0:
             return None
 
         offset = max(self.offset - self.limit, 0)
@@ -33,23 +104,29 @@ class PaginatorParams:
             limit=limit
         ))
 
-    def _get_next_url(self, items: Sequence[M]):
+    def _get_next_url(self, items: Sequence[M], key: Callable[[M], Sequence[Any]] | None):
         if len(items) < self.limit:
             return None
+        elif self.use_cursor:
+            assert key is not None, "A key is required to paginate using a cursor"
+            return str(self.req.url.include_query_params(
+                cursor=_encode_cursor(key(items[-1])),
+                limit=self.limit
+            ))
         else:
             return str(self.req.url.include_query_params(
                 offset=self.offset + self.limit,
                 limit=self.limit
             ))
 
-    def paginate(self, items: Sequence[M]):
+    def paginate(self, items: Sequence[M], key: Callable[[M], Sequence[Any]] | None = None):
         return PaginatedResponse(
             limit=self.limit,
             items=list(items),
             links=PaginatedResponseLinks(
                 # Let pydantic convert these
                 prev=self._get_prev_url(items), # type: ignore
-                next=self._get_next_url(items), # type: ignore
+                next=self._get_next_url(items, key), # type: ignore
             )
         )
 
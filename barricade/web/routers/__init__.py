@@ -3,6 +3,7 @@ from fastapi import FastAPI
 from . import admins
 from . import auth
 from . import communities
+from . import metrics
 from . import reports
 from . import web_users
 
@@ -16,5 +17,6 @@ def setup_all(app: FastAPI):
 
     admins.setup(app)
     communities.setup(app)
+    metrics.setup(app)
     reports.setup(app)
     web_users.setup(app)
@@ -23,11 +23,13 @@ async def get_all_admins(
             Security(get_active_token, scopes=Scopes.COMMUNITY_READ.to_list())
         ],
 ):
+    cursor = paginator.get_cursor(int)
     result = await communities.get_all_admins(db,
         limit=paginator.limit,
         offset=paginator.offset,
+        after=cursor[0] if cursor else None,
     )
-    return paginator.paginate(result)
+    return paginator.paginate(result, key=lambda admin: (admin.discord_id,))
 
 
 @router.post("/admins", response_model=schemas.AdminRef)
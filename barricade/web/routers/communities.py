@@ -48,11 +48,13 @@ async def get_all_communities(
             Security(get_active_token, scopes=Scopes.COMMUNITY_READ.to_list())
         ],
 ):
+    cursor = paginator.get_cursor(int)
     result = await communities.get_all_communities(db,
         limit=paginator.limit,
         offset=paginator.offset,
+        after=cursor[0] if cursor else None,
     )
-    return paginator.paginate(result)
+    return paginator.paginate(result, key=lambda community: (community.id,))
 
 @router.post("", response_model=schemas.CommunityRef)
 async def create_community(
@@ -0,0 +1,23 @@
+from typing import Annotated
+from fastapi import FastAPI, APIRouter, Security
+
+from barricade import metrics
+from barricade.web import schemas as web_schemas
+from barricade.web.scopes import Scopes
+from barricade.web.security import get_active_token
+
+router = APIRouter(prefix="", tags=["Metrics"])
+
+
+@router.get("/metrics")
+async def get_metrics(
+        token: Annotated[
+            web_schemas.TokenWithHash,
+            Security(get_active_token, scopes=Scopes.METRICS_READ.to_list())
+        ],
+):
+    return metrics.collect_all()
+
+
+def setup(app: FastAPI):
+    app.include_router(router)
@@ -1,4 +1,5 @@
 from contextlib import asynccontextmanager
+from datetime import datetime
 import discord
 from fastapi import Depends, FastAPI, APIRouter, HTTPException, Security, status
 from io import BytesIO
@@ -46,9 +47,10 @@ async def get_reports(
     result = await reports.get_all_reports(db,
         load_token=True,
         limit=paginator.limit,
-        offset=paginator.offset
+        offset=paginator.offset,
+        after=paginator.get_cursor(datetime, int), # type: ignore
     )
-    return paginator.paginate(result)
+    return paginator.paginate(result, key=lambda report: (report.created_at, report.id))
 
 @router.post("/reports", response_model=schemas.SafeReportWithToken)
 async def create_report(
@@ -264,9 +266,10 @@ async def get_own_reports(
         community_id=token.community_id,
         load_token=True,
         limit=paginator.limit,
-        offset=paginator.offset
+        offset=paginator.offset,
+        after=paginator.get_cursor(datetime, int), # type: ignore
     )
-    return paginator.paginate(result)
+    return paginator.paginate(result, key=lambda report: (report.created_at, report.id))
 
 @router.post("/communities/me/reports", response_model=schemas.SafeReportWithToken)
 async def create_own_report(
@@ -14,6 +14,7 @@ class Scopes(IntFlag):
     REPORT_ME_MANAGE = auto()
     REPORT_READ = auto()
     REPORT_MANAGE = auto()
+    METRICS_READ = auto()
 
     @classmethod
     def all(cls):
@@ -49,4 +50,5 @@ SCOPE_DESCRIPTIONS = {
     Scopes.REPORT_ME_MANAGE: "Edit and delete reports made by your community",
     Scopes.REPORT_READ: "Retrieve all reports",
     Scopes.REPORT_MANAGE: "Manage all reports",
+    Scopes.METRICS_READ: "Retrieve performance metrics",
 }
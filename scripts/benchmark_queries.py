@@ -0,0 +1,201 @@
+import argparse
+import asyncio
+import json
+from typing import Awaitable, Callable
+
+from sqlalchemy import event, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from barricade import schemas
+from barricade.crud import bans, reports, responses, watchlists
+from barricade.db import ModelBase, engine, models
+
+# Indexes that are dropped again when running with --without-indexes
+HOT_PATH_INDEXES = (
+    "ix_player_reports_player_id",
+    "ix_player_reports_report_id",
+    "ix_player_report_responses_community_id",
+    "ix_player_watchlists_community_id",
+    "ix_report_tokens_community_id",
+    "ix_report_tokens_admin_id",
+)
+
+SEED_STATEMENTS = (
+    """
+    INSERT INTO communities (id, name, tag, contact_url, is_pc, is_console, forward_guild_id, forward_channel_id, reasons_filter)
+    SELECT i, 'Community ' || i, '[C' || i || ']', 'discord.gg/c' || i, true, i % 3 = 0, i, i,
+        CASE WHEN i % 4 = 0 THEN 3 END
+    FROM generate_series(1, :communities) i
+    """,
+    """
+    INSERT INTO admins (discord_id, name, community_id)
+    SELECT i, 'Admin ' || i, i
+    FROM generate_series(1, :communities) i
+    """,
+    "UPDATE communities SET owner_id = id",
+    """
+    INSERT INTO integrations (id, community_id, integration_type, enabled, api_key, api_url)
+    SELECT i, i, 'BATTLEMETRICS', true, 'key', 'https://api.battlemetrics.com'
+    FROM generate_series(1, :communities) i
+    """,
+    """
+    INSERT INTO report_tokens (id, value, community_id, admin_id, expires_at, platform)
+    SELECT i, md5(i::text), i % :communities + 1, i % :communities + 1, now(),
+        (CASE WHEN i % 5 = 0 THEN 'CONSOLE' ELSE 'PC' END)::platform
+    FROM generate_series(1, :reports) i
+    """,
+    """
+    INSERT INTO reports (id, message_id, created_at, reasons_bitflag, reasons_custom, body, attachment_urls)
+    SELECT i, i, now() - i * interval '1 minute', 1 << (i % 8), NULL, 'Report ' || i, '{}'
+    FROM generate_series(1, :reports) i
+    """,
+    """
+    INSERT INTO players (id, bm_rcon_url)
+    SELECT '7656119' || lpad(i::text, 10, '0'), NULL
+    FROM generate_series(1, :players) i
+    """,
+    """
+    INSERT INTO player_reports (report_id, player_id, player_name)
+    SELECT r, '7656119' || lpad(((r * 7919 + k * 104729) % :players + 1)::text, 10, '0'), 'Player'
+    FROM generate_series(1, :reports) r, generate_series(0, r % 3) k
+    """,
+    """
+    INSERT INTO player_report_responses (pr_id, community_id, banned, reject_reason, responded_by)
+    SELECT pr.id, (pr.id * 7 + k * 13) % :communities + 1, (pr.id + k) % 3 = 0,
+        (CASE (pr.id + k) % 3 WHEN 1 THEN 'INSUFFICIENT' WHEN 2 THEN 'INCONCLUSIVE' END)::reportrejectreason,
+        'Admin'
+    FROM player_reports pr, generate_series(0, pr.id % 6) k
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    INSERT INTO player_bans (player_id, integration_id, remote_id)
+    SELECT '7656119' || lpad(i::text, 10, '0'), i % :communities + 1, i::text
+    FROM generate_series(1, :players, 5) i
+    """,
+    """
+    INSERT INTO player_watchlists (player_id, community_id)
+    SELECT '7656119' || lpad(i::text, 10, '0'), i % :communities + 1
+    FROM generate_series(1, :players, 10) i
+    """,
+)
+
+async def seed(conn: AsyncConnection, num_communities: int, num_reports: int, num_players: int):
+    """Create all tables in a temporary schema and fill them with generated data."""
+    await conn.execute(text("CREATE SCHEMA barricade_benchmark"))
+    await conn.execute(text("SET LOCAL search_path TO barricade_benchmark"))
+    await conn.run_sync(ModelBase.metadata.create_all)
+
+    params = {"communities": num_communities, "reports": num_reports, "players": num_players}
+    for stmt in SEED_STATEMENTS:
+        # Only pass the parameters that are actually used by the statement
+        await conn.execute(text(stmt), {k: v for k, v in params.items() if f":{k}" in stmt})
+
+    # Derive the response statistics the same way the application does
+    async with AsyncSession(bind=conn, join_transaction_mode="create_savepoint") as db:
+        await responses.rebuild_response_stats(db)
+        # Only releases the savepoint, the outer transaction is still rolled back afterwards
+        await db.commit()
+
+    await conn.execute(text("ANALYZE"))
+
+async def explain(conn: AsyncConnection, name: str, func: Callable[[AsyncSession], Awaitable]):
+    """Run a CRUD function, and print an EXPLAIN ANALYZE of every query it executes."""
+    statements: list[tuple[str, tuple]] = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, tuple(parameters or ())))
+
+    async with AsyncSession(bind=conn, join_transaction_mode="create_savepoint") as db:
+        event.listen(conn.sync_connection, "before_cursor_execute", capture)
+        try:
+            await func(db)
+        finally:
+            event.remove(conn.sync_connection, "before_cursor_execute", capture)
+
+    print(f"\n== {name}")
+    total = 0.0
+    for statement, parameters in statements:
+        if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            continue
+        result = await conn.exec_driver_sql(
+            "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement,
+            parameters,
+        )
+        plan = result.scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        plan = plan[0]
+
+        seq_scans = sorted(_find_seq_scans(plan["Plan"]))
+        total += plan["Planning Time"] + plan["Execution Time"]
+        print("  planning %8.3f ms | execution %8.3f ms | %s%s" % (
+            plan["Planning Time"],
+            plan["Execution Time"],
+            plan["Plan"]["Node Type"],
+            f" | seq scans on {', '.join(seq_scans)}" if seq_scans else "",
+        ))
+    print("  total    %8.3f ms" % total)
+
+def _find_seq_scans(node: dict) -> set[str]:
+    found = set()
+    if node["Node Type"] == "Seq Scan":
+        found.add(node["Relation Name"])
+    for child in node.get("Plans", ()):
+        found |= _find_seq_scans(child)
+    return found
+
+async def main():
+    """Script that seeds a realistic dataset into a temporary schema and prints
+    EXPLAIN ANALYZE timings of the most frequently executed queries, so that
+    performance regressions become visible. All data is rolled back afterwards."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--communities", type=int, default=100)
+    parser.add_argument("--reports", type=int, default=50_000)
+    parser.add_argument("--players", type=int, default=100_000)
+    parser.add_argument("--without-indexes", action="store_true",
+                        help="Drop the hot path indexes before benchmarking, for comparison")
+    args = parser.parse_args()
+
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            print("-- Seeding data...")
+            await seed(conn, args.communities, args.reports, args.players)
+            if args.without_indexes:
+                for index_name in HOT_PATH_INDEXES:
+                    await conn.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+                await conn.execute(text("ANALYZE"))
+
+            community_id = 1
+
+            # Simulate a full server's worth of players, of which some are reported
+            player_ids = [
+                "7656119" + str(i).rjust(10, "0")
+                for i in range(1, args.players + 1, max(1, args.players // 100))
+            ][:100]
+            reported_player_id = await conn.scalar(select(models.PlayerReport.player_id).limit(1))
+            assert reported_player_id is not None
+
+            async def get_pending_responses(db: AsyncSession):
+                community = schemas.CommunityRef.model_validate(await db.get(models.Community, community_id))
+                result = await db.scalars(
+                    select(models.PlayerReport).where(models.PlayerReport.player_id.in_(player_ids))
+                )
+                player_reports = [schemas.PlayerReportRef.model_validate(pr) for pr in result]
+                await responses.get_pending_responses(db, community, player_reports)
+
+            benchmarks: dict[str, Callable[[AsyncSession], Awaitable]] = {
+                "get_reports_for_player": lambda db: reports.get_reports_for_player(db, reported_player_id),
+                "is_player_reported": lambda db: reports.is_player_reported(db, reported_player_id),
+                "get_all_reports(community_id=...)": lambda db: reports.get_all_reports(db, community_id=community_id),
+                "get_player_bans_without_responses": lambda db: bans.get_player_bans_without_responses(db, player_ids, community_id),
+                "get_pending_responses": get_pending_responses,
+                "filter_watchlisted_player_ids": lambda db: watchlists.filter_watchlisted_player_ids(db, player_ids, community_id),
+                "classify_players_for_community_alerts": lambda db: responses.classify_players_for_community_alerts(db, player_ids, community_id),
+            }
+            for name, func in benchmarks.items():
+                await explain(conn, name, func)
+        finally:
+            await trans.rollback()
+
+if __name__ == '__main__':
+    asyncio.run(main())
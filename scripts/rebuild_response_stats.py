@@ -0,0 +1,13 @@
+import asyncio
+
+from barricade.crud.responses import rebuild_response_stats
+from barricade.db import session_factory
+
+async def main():
+    """Script to recalculate the response statistics of all reported players,
+    in case they ever got out of sync with the responses themselves."""
+    async with session_factory.begin() as db:
+        await rebuild_response_stats(db)
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,20 @@
+import asyncio
+
+from sqlalchemy import func, update
+
+from barricade.db import models, session_factory
+
+async def main():
+    """Script to reschedule all hooks that were given up on after failing
+    too many times, for instance after fixing the cause of their failure."""
+    async with session_factory.begin() as db:
+        result = await db.scalars(
+            update(models.HookDelivery)
+            .where(models.HookDelivery.next_attempt_at.is_(None))
+            .values(next_attempt_at=func.now(), attempts=0)
+            .returning(models.HookDelivery.id)
+        )
+        print("Rescheduled %s hooks" % len(result.all()))
+
+if __name__ == '__main__':
+    asyncio.run(main())